@@ -4,12 +4,22 @@ Craig Cochrane, 2022
 
 My version of Asteroids, written in python using pygame for graphics
 """
-import math
+import argparse
+import os
+import time
 import pygame
 import random as r
 
 import vector as v
 import sprite
+import collision
+import render
+import pool
+import entities
+import profiler
+import recording
+import spawner
+import highscores
 import image_loader
 
 """
@@ -18,12 +28,76 @@ TO DO:
 - Add sounds
 """
 
+# Where each texture is in the texture image, as corners in the format taken by image_loader.get_textures
+TEXTURE_PATH = "assets/textures.png"
+TEXTURE_INDEX = {"rocket": ((1, 17), (10, 27)),
+                 "rocket_flames": ((11, 17), (20, 32)),
+                 "asteroid1": ((1, 1), (16, 16)),
+                 "asteroid2": ((17, 1), (32, 16)),
+                 "asteroid3": ((33, 1), (48, 16)),
+                 "laser": ((40, 18), (41, 19))}
+
+# TrueType font the text is drawn in, or None for the font bundled with pygame. Loaded directly from the file, so
+#   starting the game doesn't have to search the system's fonts
+FONT_PATH = None
+
+# Sizes the textures are drawn at
+ROCKET_SCALE = (75, 75)
+ROCKET_FLAMES_SCALE = (75, 116)
+ASTEROID_SCALES = {1: (100, 100), 2: (150, 150), 3: (200, 200)}
+LASER_SCALE = (5, 20)
+
+STARTING_LIVES = 3  # Lives at the start of each game
+
+# Most particles alive at once, and how many are thrown out when each size of asteroid explodes and on each tick the
+#   rocket is thrusting, from EXHAUST_OFFSET pixels behind its centre
+PARTICLE_CAPACITY = 10000
+EXPLOSION_PARTICLES = {1: 50, 2: 80, 3: 120}
+EXHAUST_PARTICLES = 4
+EXHAUST_OFFSET = 45
+
+# Cached atlas of the textures at the sizes above
+TEXTURE_CACHE_PATH = "assets/cache/textures.atlas"
+
+# Leaderboard of the best scores, and the single high score file it replaced
+HIGHSCORES_PATH = "assets/highscores.json"
+LEGACY_HIGHSCORE_PATH = "assets/highscore.txt"
+
+# Bit flags for the player's input on each tick
+FORWARD = 1
+TURN_LEFT = 2
+TURN_RIGHT = 4
+FIRE = 8
+START = 16  # Click to start a game from the title or game over screen
+
+# Scenes the game can be in
+TITLE = "title"
+PLAYING = "playing"
+RESPAWN = "respawn"
+GAME_OVER = "game_over"
+
+# Title and subtitle shown on each menu
+MENU_TEXT = {TITLE: ("ASTEROIDS", "CLICK TO START GAME"), GAME_OVER: ("GAME OVER", "CLICK TO RESTART")}
+
+# Frames in one period of the menu title's pulse, sin(0.5*pi*t) with t going up by 0.01 each frame,
+#   played back at MENU_PULSE_FPS however often the menu is updated
+MENU_PULSE_FRAMES = 400
+MENU_PULSE_FPS = 60
+
+# Most seconds of each frame spent rotating textures into the rotation cache until it's warm
+WARM_TIME_PER_FRAME = 0.004
+
+# Most MiB of rotated sprite images kept in the rotation cache. Every rotation of the laser and the rocket fits with
+#   room to spare, so low-end machines aren't asked for hundreds of MiB to cache every rotation of every asteroid
+ROTATION_CACHE_MB = 32
+
 
 class Rocket(sprite.Sprite):
     """
     Class to represent the rocket and give it some necessary methods
     Child class of Sprite
     """
+    layer = render.ROCKET_LAYER
 
     def __init__(self, game):
         screen_dims = pygame.display.get_window_size()
@@ -31,24 +105,23 @@ class Rocket(sprite.Sprite):
 
         image = game.sprite_images["rocket"]
         flames_image = game.sprite_images["rocket_flames"]
-        self.flames_image = pygame.transform.scale(flames_image, (75, 116))
-        self.normal_image = pygame.transform.scale(image, (75, 75))
+        self.flames_image = game.rotation_cache.get_scaled(flames_image, ROCKET_FLAMES_SCALE)
+        self.normal_image = game.rotation_cache.get_scaled(image, ROCKET_SCALE)
 
-        super().__init__(game, image, (75, 75), self.start_pos)
+        super().__init__(game, image, ROCKET_SCALE, self.start_pos)
 
     def reset(self):
         """
         Method to reset the rocket's position on a new game
         """
-        self.position = v.vector(self.start_pos[0], self.start_pos[1])
-        self.velocity = v.vector()
-        self.acceleration = v.vector()
+        self.position = v.vector2(self.start_pos[0], self.start_pos[1])
+        self.velocity = v.vector2()
+        self.acceleration = v.vector2()
         self.angle = 0
 
         self.accelerating = False
         self.rotating = 0
-
-        self.draw()
+        self.snap()
 
     def update(self):
         """
@@ -61,7 +134,9 @@ class Rocket(sprite.Sprite):
         elif self.velocity.mag > 0:
             self.acceleration = self.velocity.unit * (-0.4)
         else:
-            self.acceleration = v.vector()
+            self.acceleration = v.vector2()
+        # Show the flames while the rocket is accelerating
+        self.scaled_image = self.flames_image if self.accelerating else self.normal_image
 
         # Set angular velocity depending on whether the a or d keys have been pressed
         if self.rotating == 1:
@@ -71,31 +146,31 @@ class Rocket(sprite.Sprite):
         else:
             self.angular_velocity = 0
 
-        for asteroid in self.game.asteroids:
-            if self.check_collision(asteroid):
-                asteroid.destroy()
-                self.game.new_life()
-        for beam in self.game.laser_beams:
-            if self.check_collision(beam) and beam.elapsed > 50:
+        bounds = self.bounds()
+        with self.game.profiler.phase("collisions", traced=False):
+            asteroid_hits = [asteroid for asteroid in self.game.asteroid_grid.query_rect(bounds)
+                             if self.check_collision(asteroid)]
+            beam_hits = [beam for beam in self.game.laser_grid.query_rect(bounds) if self.check_collision(beam)]
+        for asteroid in asteroid_hits:
+            asteroid.destroy()
+            self.game.new_life()
+            return
+        for beam in beam_hits:
+            if beam.elapsed > 50:
                 self.game.new_life()
+                return
 
+        self.accelerating = False
         self.rotating = 0
         super().update()
 
-    def draw(self):
-        """
-        Method to change the image used by the rocket if it's accelerating
-        """
-        if self.accelerating:
-            self.scaled_image = self.flames_image
-        else:
-            self.scaled_image = self.normal_image
-
-        self.accelerating = False
-        super().draw()
-
     def move_forward(self):
         self.accelerating = True
+        particles = self.game.particles
+        if particles is not None:
+            nozzle = self.position - self.direction * EXHAUST_OFFSET
+            velocity = self.velocity * sprite.TIME_SCALE  # Particles move in pixels per real second
+            particles.exhaust((nozzle.x, nozzle.y), (velocity.x, velocity.y), self.angle, EXHAUST_PARTICLES)
 
     def turn_left(self):
         self.rotating = 1
@@ -108,9 +183,7 @@ class Rocket(sprite.Sprite):
         Method to fire a laser beam
         """
         speed = self.direction * 100
-        new_beam = Laser(self.game, (self.position[0], self.position[1]), speed, start_angle=self.angle)
-        self.game.laser_beams.append(new_beam)
-        self.game.display_objects.append(new_beam)
+        self.game.add_laser((self.position[0], self.position[1]), speed, self.angle)
 
 
 class Asteroid(sprite.Sprite):
@@ -118,82 +191,21 @@ class Asteroid(sprite.Sprite):
     Class to represent the asteroids and give them the necessary methods
     Child class of Sprite
     """
+    in_physics_world = True
+    layer = render.ASTEROID_LAYER
 
-    def __init__(self, game, size, init_pos=(0, 0), image=None):
-        img_scale = (0, 0)
-        match size:
-            case 1:
-                img_scale = (100, 100)
-            case 2:
-                img_scale = (150, 150)
-            case 3:
-                img_scale = (200, 200)
-
+    def __init__(self, game, size, image, position, velocity, angular_velocity=0):
         self.size = size
-        self.screen_dims = pygame.display.get_window_size()
-        init_conditions = self.initial_conditions()
-        if size != 3:
-            init_conditions[0] = init_pos
-
-        if image is None:
-            image_options = (
-                game.sprite_images["asteroid1"], game.sprite_images["asteroid2"], game.sprite_images["asteroid3"])
-            image = r.choice(image_options)
-
         # Call the sprite class constructor
-        super().__init__(game, image, img_scale, init_conditions[0], init_conditions[1], init_conditions[2])
-
-    def initial_conditions(self):
-        """
-        Method to calculate initial values for position, velocity and angular velocity
-
-        All values are calculated to be within sensible values and the position is checked
-        so that it isn't too near the player
-        :return initial_conditions:
-        """
-        init_conditions = []
-        # Assign the asteroid a random position
-        # Starts by assigning the position in the centre, then repeatedly calculates new values until it is away
-        # from the centre
-        position = (self.screen_dims[0] / 2, self.screen_dims[1] / 2)
-        while ((self.screen_dims[0] / 2) + 150 > position[0] > (self.screen_dims[0] / 2) - 150) and (
-                (self.screen_dims[0] / 2) + 150 > position[0] > (self.screen_dims[0] / 2) - 150):
-            position = (r.randint(0, self.screen_dims[0]), r.randint(0, self.screen_dims[1]))
-        init_conditions.append(position)
-
-        # Assign the asteroid a speed in the x and y axes
-        rand_speed = lambda min_speed, max_speed: r.choice((-1, 1)) * (
-                r.randint(min_speed, max_speed) + ((1 / r.randint(1, 10)) * r.randint(0, 1)))
-        speed_range = ()
-        match self.size:
-            case 3:
-                speed_range = (5, 8)
-            case 2:
-                speed_range = (7, 10)
-            case 1:
-                speed_range = (10, 13)
-
-        velocity = (rand_speed(speed_range[0], speed_range[1]), rand_speed(speed_range[0], speed_range[1]))
-        init_conditions.append(velocity)
-
-        # Assign the asteroid a random angular velocity
-        angular_velocity = r.choice((-1, 1)) * (1 / r.randint(1, 10))
-        init_conditions.append(angular_velocity)
+        super().__init__(game, image, ASTEROID_SCALES[size], position, velocity, angular_velocity)
 
-        return init_conditions
-
-    def reset(self):
+    def spawn(self, size, image, position, velocity, angular_velocity=0):
         """
-        Method to reset the asteroid to a new position and velocity
-        :return:
+        Method to set up an asteroid from the game's pool again as a new asteroid
+        Takes the same arguments as the constructor
         """
-        reset_conditions = self.initial_conditions()
-
-        self.position = v.vector(reset_conditions[0][0], reset_conditions[0][1])
-        self.velocity = v.vector(reset_conditions[1][0], reset_conditions[1][1])
-        self.angle = reset_conditions[2]
-
-        self.draw()
+        self.size = size
+        self.setup(image, ASTEROID_SCALES[size], position, velocity, angular_velocity)
 
     def destroy(self, laser=False):
         """
@@ -201,11 +213,16 @@ class Asteroid(sprite.Sprite):
         If hit by a laser, laser is passed in as True and the player will not get any points
         :param laser:
         """
+        position = (self.position[0], self.position[1])
+        particles = self.game.particles
+        if particles is not None:
+            velocity = self.velocity * sprite.TIME_SCALE  # Particles move in pixels per real second
+            particles.explosion(position, (velocity.x, velocity.y), ASTEROID_SCALES[self.size][0] / 2,
+                                EXPLOSION_PARTICLES[self.size])
+
         if self.size > 1:
-            for i in range(2):
-                new_asteroid = Asteroid(self.game, self.size - 1, (self.position[0], self.position[1]), self.image)
-                self.game.asteroids.append(new_asteroid)
-                self.game.display_objects.append(new_asteroid)
+            for velocity, angular_velocity in spawner.spawn_motions(self.game.rng, 2, self.size - 1):
+                self.game.add_asteroid(self.size - 1, self.image, position, velocity, angular_velocity)
 
         new_score = 0
         match self.size:
@@ -218,30 +235,43 @@ class Asteroid(sprite.Sprite):
 
         if laser:
             self.game.score += new_score
-        self.game.asteroids.remove(self)
-        self.game.display_objects.remove(self)
-        del self
+        self.detach()
+        self.game.asteroid_grid.remove(self)
+        self.game.entities.remove(self)
 
 
 class Laser(sprite.Sprite):
     """
     Class to represent the laser beam fired from the rocket
     """
+    in_physics_world = True
+    layer = render.LASER_LAYER
 
     def __init__(self, game, start_pos, start_velocity, start_angle):
         image = game.sprite_images["laser"]
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = game.time
         self.elapsed = 0
-        super().__init__(game, image, (5, 20), start_pos, start_velocity, init_angle=start_angle)
+        super().__init__(game, image, LASER_SCALE, start_pos, start_velocity, init_angle=start_angle)
+
+    def spawn(self, start_pos, start_velocity, start_angle):
+        """
+        Method to set up a laser from the game's pool again as a new laser beam
+        Takes the same arguments as the constructor
+        """
+        self.start_time = self.game.time
+        self.elapsed = 0
+        self.setup(self.game.sprite_images["laser"], LASER_SCALE, start_pos, start_velocity, init_angle=start_angle)
 
     def update(self):
         destroyed = False
-        for asteroid in self.game.asteroids:
-            if self.check_collision(asteroid):
-                asteroid.destroy(True)
-                destroyed = True
+        with self.game.profiler.phase("collisions", traced=False):
+            hits = [asteroid for asteroid in self.game.asteroid_grid.query_rect(self.bounds())
+                    if self.check_collision(asteroid)]
+        for asteroid in hits:
+            asteroid.destroy(True)
+            destroyed = True
 
-        self.elapsed = pygame.time.get_ticks() - self.start_time
+        self.elapsed = self.game.time - self.start_time
         if self.elapsed > 1000:
             destroyed = True
 
@@ -251,9 +281,9 @@ class Laser(sprite.Sprite):
             super().update()
 
     def destroy(self):
-        self.game.laser_beams.remove(self)
-        self.game.display_objects.remove(self)
-        del self
+        self.detach()
+        self.game.laser_grid.remove(self)
+        self.game.entities.remove(self)
 
 
 class Asteroids:
@@ -261,247 +291,631 @@ class Asteroids:
     Main Asteroids game class
     """
 
-    def __init__(self):
+    def __init__(self, numpy_physics=False, rotation_steps=360, headless=False, seed=None, dirty_rects=False,
+                 profile_trace=None, physics_hz=60, max_steps_per_frame=5, texture_cache=TEXTURE_CACHE_PATH,
+                 sort_by_texture=False, record=None, player_name="PLAYER", startup_report=False,
+                 wave_size=(1, 4), first_wave=3, particle_capacity=PARTICLE_CAPACITY,
+                 rotation_cache_mb=ROTATION_CACHE_MB, trace_frames=profiler.TRACE_FRAMES):
+        """
+        Constructor method for the game
+
+        :param numpy_physics: if True, asteroids and lasers are integrated together by a NumPy physics world
+        :param rotation_steps: number of angles per revolution the rotated sprite images are cached at
+        :param headless: if True, use SDL's dummy video driver and don't enter the title screen, so the game can be
+            stepped by calling start_game and tick (see headless.py)
+        :param seed: seed for the game's random number generator, chosen at random if None
+        :param dirty_rects: if True, only redraw and update the parts of the screen that change each frame
+        :param profile_trace: path to save a trace of the last trace_frames frames' timings to when the game is closed,
+            as Chrome trace JSON if it ends in .json or CSV otherwise
+        :param physics_hz: number of fixed length ticks the game is updated by per second, separately from the frame
+            rate; the sprites are drawn between their last two states
+        :param max_steps_per_frame: most ticks run to catch up after a slow frame, after which the game slows down
+            instead of falling further behind
+        :param texture_cache: path to cache the texture atlas at, or None to cut and scale the textures every time
+        :param sort_by_texture: if True, the sprites in each layer are drawn grouped by texture
+        :param record: path to save a recording of the seed and every tick's input to when the game is closed,
+            which can be played back with replay.py
+        :param player_name: name the player's scores are saved under on the leaderboard
+        :param startup_report: if True, print how long each step of starting the game took once the first frame is
+            shown
+        :param wave_size: (fewest, most) asteroids in each wave spawned when fewer than 3 are left
+        :param first_wave: number of asteroids at the start of each game
+        :param particle_capacity: most particles alive at once for the explosions and the rocket's exhaust, or 0 for
+            no particles
+        :param rotation_cache_mb: most MiB of rotated sprite images to cache, the least recently used being dropped
+        :param trace_frames: number of recent frames kept in the trace saved to profile_trace
+        """
+        self.startup = profiler.StartupTimer()
+        self.startup_report = startup_report
+
         # ---Initialise pygame and screen---
-        pygame.init()
+        self.headless = headless
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+        # Only the display and fonts are used, so the other subsystems (audio, joysticks...) aren't started
+        pygame.display.init()
+        pygame.font.init()
         window_width = 1280
         window_height = 720
 
         self.screen = pygame.display.set_mode((window_width, window_height))
         pygame.display.set_caption("Asteroids")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Helvetica", 30)
-        self.title_font = pygame.font.SysFont("Helvetica", 100)
+        self.startup.mark("display")
+
+        self.font = pygame.font.Font(FONT_PATH, 30)
+        self.title_font = pygame.font.Font(FONT_PATH, 100)
 
-        self.background_image = pygame.image.load("assets/background.png")
-        self.background_image = self.background_image.convert_alpha()
+        self.overlay_font = pygame.font.Font(FONT_PATH, 18)
+        self.text_cache = render.TextCache()
+        self.startup.mark("fonts")
+
+        # The background is opaque, so it's converted without alpha to be drawn faster
+        self.background_image = pygame.image.load("assets/background.png").convert()
+        if dirty_rects:
+            self.renderer = render.DirtyRectRenderer(self.screen, self.background_image, sort_by_texture)
+        else:
+            self.renderer = render.ScreenRenderer(self.screen, self.background_image, sort_by_texture)
+        self.startup.mark("background")
 
         # ---Initialise game objects and variables---
-        self.lives = 3
+        self.lives = STARTING_LIVES
         self.score = 0
         self.dt = 0.01
-
-        image_index = {"rocket": ((1, 17), (10, 27)),
-                       "rocket_flames": ((11, 17), (20, 32)),
-                       "asteroid1": ((1, 1), (16, 16)),
-                       "asteroid2": ((17, 1), (32, 16)),
-                       "asteroid3": ((33, 1), (48, 16)),
-                       "laser": ((40, 18), (41, 19))}
-        self.sprite_images = image_loader.get_textures("assets/textures.png", image_index)
+        self.step_dt = 1 / physics_hz  # Length of each tick when the game is run by run()
+        self.max_steps_per_frame = max_steps_per_frame
+        self.time = 0  # Simulation time in ms
+        self.seed = seed if seed is not None else r.randrange(2 ** 63)
+        self.rng = r.Random(self.seed)
+
+        self.rotation_cache = render.RotationCache(rotation_steps, rotation_cache_mb * 1024 * 1024)
+        # Pixel masks of the rotated textures, for the narrow phase of collision detection
+        self.mask_cache = collision.MaskCache(self.rotation_cache)
+        if texture_cache is None:
+            self.sprite_images = image_loader.get_textures(TEXTURE_PATH, TEXTURE_INDEX)
+        else:
+            # Load the textures already scaled to each size they're drawn at, with every rotation of the laser
+            texture_scales = {"rocket": [ROCKET_SCALE], "rocket_flames": [ROCKET_FLAMES_SCALE], "laser": [LASER_SCALE],
+                              "asteroid1": list(ASTEROID_SCALES.values()),
+                              "asteroid2": list(ASTEROID_SCALES.values()),
+                              "asteroid3": list(ASTEROID_SCALES.values())}
+            atlas = image_loader.load_atlas(TEXTURE_PATH, TEXTURE_INDEX, texture_scales, texture_cache,
+                                            rotation_steps, rotated=("laser",))
+            self.sprite_images = atlas.textures
+            self.rotation_cache.add_atlas(atlas)
+
+        self.startup.mark("textures")
+
+        # Textures to pre-rotate: only the small ones drawn on every frame of a game. They're rotated a little each
+        #   frame by run(), instead of holding up the first frame. The asteroids and the rocket's flames are rotated
+        #   as they're drawn, keeping the most recently drawn rotations up to the cache's bound
+        self.warm_textures = None
+        if not headless:
+            self.warm_textures = [(self.sprite_images["laser"], LASER_SCALE),
+                                  (self.sprite_images["rocket"], ROCKET_SCALE)]
+        # Textures to make the collision mask of every rotation of, so no masks are made during play. Warmed after
+        #   the rotations by run(), or straight away by a headless game, which has no frames to spread them over
+        self.mask_textures = ([(self.sprite_images["laser"], LASER_SCALE),
+                               (self.sprite_images["rocket"], ROCKET_SCALE)] +
+                              [(self.sprite_images[name], ASTEROID_SCALES[size])
+                               for size in sorted(ASTEROID_SCALES, reverse=True)
+                               for name in spawner.ASTEROID_TEXTURES])
+        if headless:
+            self.warm_caches()
+            self.startup.mark("collision masks")
+
+        self.physics = None
+        if numpy_physics:
+            import physics  # Only needs NumPy when the physics world is used
+            self.physics = physics.PhysicsWorld((window_width, window_height))
+
+        # Particles are only drawn, so headless games go without them, as do games without NumPy
+        self.particles = None
+        if particle_capacity and not headless:
+            try:
+                import particles
+            except ImportError:
+                pass
+            else:
+                self.particles = particles.ParticleSystem(self.screen, particle_capacity, self.seed)
 
         self.rocket = Rocket(self)
-        self.asteroids = []  # Empty list to contain the asteroids on screen
-        self.laser_beams = []
-        self.display_objects = []
+        self.entities = entities.EntityRegistry()  # The rocket, asteroids and laser beams in the game
+        # Broad phase collision grids, kept up to date as the sprites move
+        # Hits are sorted by entity ID so they come out in the same order when a saved game is restored
+        self.asteroid_grid = collision.SpatialHash(order_key=entity_order)
+        self.laser_grid = collision.SpatialHash(order_key=entity_order)
+        # Pools of released asteroids and lasers to reuse
+        self.asteroid_pool = pool.ObjectPool(self, Asteroid)
+        self.laser_pool = pool.ObjectPool(self, Laser)
+        self.pools = {Asteroid: self.asteroid_pool, Laser: self.laser_pool}
+        self.spawner = spawner.WaveSpawner(self, wave_size, first_wave)
+
+        # Per-frame timing, shown over the game with F3
+        self.profiler = profiler.FrameProfiler(trace_frames=trace_frames)
+        self.profile_trace_path = profile_trace
+        if profile_trace is not None:
+            self.profiler.start_recording()
+
+        self.record_path = record
+        self.recorder = recording.InputRecorder(self) if record is not None else None
+
+        # Leaderboard, loaded once here and saved in the background, so headless games leave it alone
+        self.player_name = player_name
+        self.highscores = None if headless else highscores.HighScores(HIGHSCORES_PATH,
+                                                                      legacy_path=LEGACY_HIGHSCORE_PATH)
 
         # ---Enter the title page---
-        self.title_screen()
+        self.scene = None
+        self.next_scene = None  # Scene to change to at the end of the current tick
+        self.menu_asteroids = []
+        self.menu_time = 0  # Seconds since the menu was entered
+        self.new_highscore = False
+        self.pulse_animations = {}  # Pulsing title text for each menu, made the first time it's shown
+        self.startup.mark("game objects")
+        if not headless:
+            self.run()
+
+    def run(self):
+        """
+        Method to run the game, starting at the title screen.
+        One loop handles every scene, so the call stack stays the same depth however many games are played.
 
-    def title_screen(self):
+        The game is updated in fixed ticks of step_dt, as many as fit in the time since the last frame (up to
+        max_steps_per_frame), so a slow frame can't make one huge step. Whatever time is left over is carried to the
+        next frame, and the sprites are drawn that fraction of the way between their last two states.
         """
-        Method to make and loop the title screen.
-        Calls the main game loop when the mouse is pressed
+        self.change_scene(TITLE)
+        accumulator = self.step_dt  # Time not yet simulated in s, starting with one tick
+        held_actions = 0  # Shots fired and clicks made on a frame that didn't run a tick
+        try:
+            while True:
+                self.profiler.begin_frame()
+                actions = self.read_input() | held_actions
+
+                steps = 0
+                while accumulator >= self.step_dt and steps < self.max_steps_per_frame:
+                    self.dt = self.step_dt
+                    self.tick(actions)
+                    actions &= ~(FIRE | START)  # Only fire or click once however many ticks the frame runs
+                    accumulator -= self.step_dt
+                    steps += 1
+                held_actions = actions & (FIRE | START)
+                if accumulator >= self.step_dt:
+                    # Too far behind to catch up, so drop the whole ticks that weren't simulated, keeping the part of a
+                    #   tick left over to draw the sprites at
+                    accumulator %= self.step_dt
+
+                self.draw(accumulator / self.step_dt)
+
+                with self.profiler.phase("flip"):
+                    self.renderer.end_frame()  # display the screen updates
+                if self.warm_textures is not None or self.mask_textures is not None:
+                    with self.profiler.phase("warm"):
+                        self.warm_caches(WARM_TIME_PER_FRAME)
+                self.profiler.end_frame()
+                if self.startup is not None:
+                    self.startup.mark("first frame")
+                    if self.startup_report:
+                        print("\n".join(self.startup.report_lines()))
+                    self.startup = None
+                frame_time = self.clock.tick(60)
+                accumulator += frame_time / 1000  # add the time taken by the frame (in s)
+        finally:
+            # Saved however the game exits, so a crash or an interrupt doesn't lose them
+            self.save_recordings()
+
+    def warm_caches(self, time_limit=None):
         """
-        bg_asteroids = []
-
-        title_text = "ASTEROIDS"
-        init_title_text_img = self.title_font.render(title_text, True, (255, 255, 255))
-
-        subtitle_text = "CLICK TO START GAME"
-        subtitle_text_img = self.font.render(subtitle_text, True, (255, 255, 255))
+        Method to pre-rotate the textures in warm_textures and then make the collision masks of the textures in
+        mask_textures, setting each to None once it's done
+        With a time limit, the caches can be warmed a little at a time by calling this again until both are None.
 
-        dt = 0.01
-        t = 0
-
-        for i in range(2):
-            new_asteroid = Asteroid(self, 3)
-            bg_asteroids.append(new_asteroid)
-
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.start_game()
+        :param time_limit: seconds to stop after, or None to warm everything
+        """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        if self.warm_textures is not None:
+            if not self.rotation_cache.warm(self.warm_textures, time_limit):
+                return
+            self.warm_textures = None
+        if self.mask_textures is not None:
+            if self.mask_cache.warm(self.mask_textures,
+                                    None if deadline is None else max(deadline - time.perf_counter(), 0)):
+                self.mask_textures = None
+
+    def tick(self, actions):
+        """
+        Method to advance the current scene by one tick, then change scene if a change was asked for during the tick
+        :param actions: bit flags of the actions the player is taking this tick
+        """
+        if self.recorder is not None:
+            self.recorder.record(actions)
+
+        if self.scene == PLAYING:
+            with self.profiler.phase("input"):
+                self.apply_input(actions)
+            self.update()
+        elif self.scene == RESPAWN:
+            self.respawn()
+        else:
+            with self.profiler.phase("menu"):
+                if actions & START:
+                    self.next_scene = PLAYING
+                self.update_menu()
 
-            self.screen.blit(self.background_image, (0, 0))
-            for asteroid in bg_asteroids:
-                asteroid.update()
-                asteroid.draw()
+        if self.next_scene is not None:
+            scene = self.next_scene
+            self.next_scene = None
+            self.change_scene(scene)
 
-            # Scale the title text to make it pulse slowly
-            scale_size = (init_title_text_img.get_size()[0] + 40 * math.sin(0.5 * math.pi * t),
-                          init_title_text_img.get_size()[1] + 10 * math.sin(0.5 * math.pi * t))
-            title_text_img = pygame.transform.scale(init_title_text_img, scale_size)
-            t += dt
+    def change_scene(self, scene):
+        """
+        Method to change to a new scene and set it up
+        :param scene: one of TITLE, PLAYING, RESPAWN or GAME_OVER
+        """
+        previous_scene = self.scene
+        self.scene = scene
+        self.renderer.invalidate()
+
+        if scene == TITLE:
+            self.enter_menu(*MENU_TEXT[TITLE])
+        elif scene == PLAYING and previous_scene != RESPAWN:
+            self.new_game()
+        elif scene == GAME_OVER:
+            self.enter_menu(*MENU_TEXT[GAME_OVER])
+            self.new_highscore = self.highscores is not None and self.highscores.add(self.player_name, self.score) == 0
 
-            # Display the title and subtitle text
-            self.screen.blit(title_text_img, img_display_pos(title_text_img, (640, 275)))
-            self.screen.blit(subtitle_text_img, img_display_pos(subtitle_text_img, (640, 350)))
+    def start_game(self):
+        """
+        Method to start a new game straight away, from any scene
+        """
+        # Coming from no scene, so a game left in RESPAWN is set up again rather than carried on
+        self.scene = None
+        self.change_scene(PLAYING)
 
-            fps_text = str(round(self.clock.get_fps()))
-            fps_text_img = self.font.render(fps_text, True, (255, 255, 255))
-            self.screen.blit(fps_text_img, (1220, 20))
+    def reset(self, seed):
+        """
+        Method to start a new game with a new seed, whatever state the last game was left in, so a game reused for
+        many episodes plays each one out the same as a new game would
 
-            pygame.display.flip()  # display the screen updates
-            self.clock.tick(60)  # run at 60 FPS
+        :param seed: seed for the game's random number generator
+        """
+        self.seed = seed
+        self.rng = r.Random(seed)
+        self.time = 0
+        self.next_scene = None
+        self.start_game()
 
-    def start_game(self):
+    def new_game(self):
         """
-        Method to start the game
-        Calls the main game loop once the objects and variables are set up
+        Method to set up the objects and variables for a new game
         """
-        self.lives = 3
+        self.lives = STARTING_LIVES
         self.score = 0
         self.dt = 0.01
 
-        self.asteroids = []  # Empty list to contain the asteroids on screen
-        self.laser_beams = []
+        self.clear_objects()
         self.rocket.reset()
 
-        self.display_objects = [self.rocket]
-        for i in range(3):
-            self.add_asteroid()
-
-        self.game_loop()
+        self.entities.add(self.rocket)
+        self.spawner.start()
+        self.flush_entities()
 
-    def game_loop(self):
-        # ---Main game loop---
-        while True:
-            # Handle the event queue
+    def read_input(self):
+        """
+        Method to handle the event queue and read the keyboard
+        :return actions: bit flags of the actions the player is taking this tick
+        """
+        actions = 0
+        with self.profiler.phase("events"):
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
+                    self.quit()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
-                        self.rocket.fire()
+                        actions |= FIRE
+                    elif event.key == pygame.K_F3:
+                        self.profiler.toggle_overlay()
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    actions |= START
 
+        with self.profiler.phase("input"):
             # Get a list of keys currently being pressed
             key_input = pygame.key.get_pressed()
             # If the w key is being pressed
             if key_input[pygame.K_w]:
-                self.rocket.move_forward()
+                actions |= FORWARD
             if key_input[pygame.K_a]:
-                self.rocket.turn_left()
+                actions |= TURN_LEFT
             if key_input[pygame.K_d]:
-                self.rocket.turn_right()
+                actions |= TURN_RIGHT
 
-            # Update the objects on screen
-            self.screen.blit(self.background_image, (0, 0))
+        return actions
 
-            for i in self.display_objects:
-                i.update()
-                i.draw()
+    def quit(self):
+        """
+        Method to close the game, waiting for the leaderboard to finish saving
+        The profiler's trace and the input recording are saved by run as the game exits.
+        """
+        if self.highscores is not None:
+            self.highscores.close()
+        pygame.quit()
+        raise SystemExit
 
-            if len(self.asteroids) < 3:
-                for i in range(r.randint(1,4)):
-                    self.add_asteroid()
+    def save_recordings(self):
+        """
+        Method to save the profiler's trace and the input recording, if they're being recorded
+        """
+        if self.profile_trace_path is not None:
+            self.profiler.save(self.profile_trace_path)
+        if self.recorder is not None:
+            self.recorder.save(self.record_path)
 
-            top_text = "Score: " + str(self.score) + "     " + "Lives: " + str(self.lives)
-            top_text_img = self.font.render(top_text, True, (255, 255, 255))
-            self.screen.blit(top_text_img, (20, 20))
+    def apply_input(self, actions):
+        """
+        Method to pass the player's actions for this tick on to the rocket
+        :param actions: bit flags made from FORWARD, TURN_LEFT, TURN_RIGHT and FIRE
+        """
+        if actions & FIRE:
+            self.rocket.fire()
+        if actions & FORWARD:
+            self.rocket.move_forward()
+        if actions & TURN_LEFT:
+            self.rocket.turn_left()
+        if actions & TURN_RIGHT:
+            self.rocket.turn_right()
+
+    def update(self):
+        """
+        Method to advance the game by one tick of length dt
+        """
+        self.time += self.dt * 1000
+        with self.profiler.phase("entities"):
+            self.flush_entities()  # Add the lasers fired this tick
+
+        # Entities destroyed earlier in the tick stay in the registry until it's flushed, so are skipped here
+        if self.profiler.enabled:
+            # Time the updates of each class of entity separately (this includes their collision checks), only adding
+            #   them to each class's total, so the trace doesn't grow with the number of entities
+            with self.profiler.phase("updates"):
+                for entity in self.entities:
+                    if entity.alive:
+                        start = time.perf_counter()
+                        entity.update()
+                        self.profiler.add_total("update " + type(entity).__name__, time.perf_counter() - start)
+        else:
+            for entity in self.entities:
+                if entity.alive:
+                    entity.update()
+
+        with self.profiler.phase("entities"):
+            self.flush_entities()
+        with self.profiler.phase("physics"):
+            self.step_physics()
+        if self.particles is not None:
+            with self.profiler.phase("particles"):
+                self.particles.update(self.dt)
+
+        if self.spawner.update():
+            self.flush_entities()
+
+    def draw(self, alpha=1.0):
+        """
+        Method to draw the current scene to the screen
+        :param alpha: fraction of the way from the sprites' states before the last tick to their current states to
+            draw them at
+        """
+        with self.profiler.phase("draw"):
+            self.renderer.begin_frame()
+            if self.scene in (TITLE, GAME_OVER):
+                self.draw_menu(alpha)
+            else:
+                self.draw_game(alpha)
+        with self.profiler.phase("hud"):
+            if self.scene in (PLAYING, RESPAWN):
+                self.draw_hud()
+            self.profiler.draw_overlay(self, self.overlay_font)
+        with self.profiler.phase("blit"):
+            self.renderer.submit()
+
+    def draw_game(self, alpha=1.0):
+        """
+        Method to draw the game's sprites to the screen
+        :param alpha:
+        """
+        for entity in self.entities:
+            entity.draw(alpha)
+        if self.particles is not None:
+            self.particles.draw(self.renderer, alpha)
 
-            fps_text = str(round(self.clock.get_fps()))
-            fps_text_img = self.font.render(fps_text, True, (255, 255, 255))
-            self.screen.blit(fps_text_img, (1220, 20))
+    def draw_hud(self):
+        """
+        Method to draw the score, lives and FPS over the game
+        """
+        top_text = "Score: " + str(self.score) + "     " + "Lives: " + str(self.lives)
+        top_text_img = self.text_cache.render(self.font, top_text)
+        self.renderer.blit(top_text_img, (20, 20))
 
-            pygame.display.flip()  # display the screen updates
-            frame_time = self.clock.tick(60)
-            self.dt = frame_time / 1000  # set time step to time taken by previous frame (in s)
+        fps_text = str(round(self.clock.get_fps()))
+        fps_text_img = self.text_cache.render(self.font, fps_text)
+        self.renderer.blit(fps_text_img, (1220, 20))
 
     def new_life(self):
         """
-        Method to reset the game for a new point
+        Method to use up a life after the rocket is hit
+        Changes to the respawn scene, or the game over scene if there are no lives left, at the end of the tick
         """
         self.lives -= 1
-        if self.lives < 0:
-            self.game_over()
+        self.next_scene = GAME_OVER if self.lives < 0 else RESPAWN
 
+    def respawn(self):
+        """
+        Method to reset the rocket and clear the laser beams for a new life
+        """
         for beam in self.laser_beams:
             beam.destroy()
+        self.flush_entities()
         self.rocket.reset()
-        self.game_loop()
+        self.next_scene = PLAYING
 
-    def game_over(self):
+    def enter_menu(self, title_text, subtitle_text):
+        """
+        Method to set up the title or game over screen, with a couple of asteroids floating in the background
+        :param title_text:
+        :param subtitle_text:
         """
-        Method to handle the end of the game
+        self.clear_objects()
+        centre = (self.screen.get_width() / 2, self.screen.get_height() / 2)  # Kept clear for the menu text
+        self.menu_asteroids = [self.asteroid_pool.acquire(3, *conditions)
+                               for conditions in self.spawner.conditions(2, 3, centre)]
+        self.show_menu_text(title_text, subtitle_text)
+        self.menu_time = 0
+
+    def show_menu_text(self, title_text, subtitle_text):
         """
-        bg_asteroids = []
+        Method to set the text shown on the title or game over screen
+        :param title_text:
+        :param subtitle_text:
+        """
+        if title_text not in self.pulse_animations:
+            title_text_img = self.text_cache.render(self.title_font, title_text)
+            self.pulse_animations[title_text] = render.PulseAnimation(title_text_img, MENU_PULSE_FRAMES)
+        self.title_animation = self.pulse_animations[title_text]
+        self.subtitle_text_img = self.text_cache.render(self.font, subtitle_text)
 
-        title_text = "GAME OVER"
-        init_title_text_img = self.title_font.render(title_text, True, (255, 255, 255))
+    def update_menu(self):
+        """
+        Method to move the background asteroids on the title and game over screens
+        """
+        for asteroid in self.menu_asteroids:
+            asteroid.update()
+        self.step_physics()
+        self.menu_time += self.dt
 
-        subtitle_text = "CLICK TO RESTART"
-        subtitle_text_img = self.font.render(subtitle_text, True, (255, 255, 255))
+    def draw_menu(self, alpha=1.0):
+        """
+        Method to draw the title or game over screen
+        :param alpha:
+        """
+        for asteroid in self.menu_asteroids:
+            asteroid.draw(alpha)
 
-        dt = 0.01
-        t = 0
+        # Get this frame of the title text pulsing slowly
+        title_text_img = self.title_animation.get(int(self.menu_time * MENU_PULSE_FPS))
 
-        for i in range(2):
-            new_asteroid = Asteroid(self, 3)
-            bg_asteroids.append(new_asteroid)
+        # Display the title and subtitle text
+        if self.scene == TITLE:
+            self.renderer.blit(title_text_img, img_display_pos(title_text_img, (640, 275)))
+            self.renderer.blit(self.subtitle_text_img, img_display_pos(self.subtitle_text_img, (640, 350)))
+        else:
+            self.renderer.blit(title_text_img, img_display_pos(title_text_img, (640, 225)))
+            self.renderer.blit(self.subtitle_text_img, img_display_pos(self.subtitle_text_img, (640, 325)))
 
-        new_highscore = False
-        highscore_text_img = None
-        f = open("assets/highscore.txt", "r")
-        lines = f.read()
-        print(type(lines))
-        if int(lines) < self.score:
-            f.close()
-            f = open("assets/highscore.txt", "w")
-            f.write(str(self.score))
-            new_highscore = True
-        f.close()
+            # Render and display the final score
+            score_text = "SCORE: {}".format(self.score)
+            score_text_img = self.text_cache.render(self.title_font, score_text)
+            self.renderer.blit(score_text_img, img_display_pos(score_text_img, (640, 480)))
 
-        if new_highscore:
-            highscore_txt_img = self.title_font.render("NEW HIGH SCORE", True, (255, 255, 255))
+            # Render display new high score text if applicable
+            if self.new_highscore:
+                highscore_text_img = self.text_cache.render(self.title_font, "NEW HIGH SCORE")
+                self.renderer.blit(highscore_text_img, img_display_pos(highscore_text_img, (640, 600)))
 
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    self.start_game()
+        # Render and display FPS
+        fps_text = str(round(self.clock.get_fps()))
+        fps_text_img = self.text_cache.render(self.font, fps_text)
+        self.renderer.blit(fps_text_img, (1220, 20))
 
-            self.screen.blit(self.background_image, (0, 0))
-            for asteroid in bg_asteroids:
-                asteroid.update()
-                asteroid.draw()
+    def clear_objects(self):
+        """
+        Method to remove all of the asteroids, laser beams and particles from the game, handing the asteroids and
+        laser beams back to their pools
+        """
+        self.asteroid_grid.clear()
+        self.laser_grid.clear()
+        if self.physics is not None:
+            self.physics.clear()
+        if self.particles is not None:
+            self.particles.clear()
+        for entity in self.entities.clear():
+            self.release(entity)
+        self.asteroid_pool.release_all(self.menu_asteroids)
+        self.menu_asteroids = []
+
+    def flush_entities(self):
+        """
+        Method to apply the additions and removals made to the entities during the tick,
+        handing the removed asteroids and lasers back to their pools
+        """
+        for entity in self.entities.flush():
+            self.release(entity)
 
-            # Scale the title text to make it pulse slowly
-            scale_size = (init_title_text_img.get_size()[0] + 40 * math.sin(0.5 * math.pi * t),
-                          init_title_text_img.get_size()[1] + 10 * math.sin(0.5 * math.pi * t))
-            title_text_img = pygame.transform.scale(init_title_text_img, scale_size)
-            t += dt
+    def release(self, entity):
+        """
+        Method to hand an entity back to its pool, if it has one
+        :param entity:
+        """
+        entity_pool = self.pools.get(type(entity))
+        if entity_pool is not None:
+            entity_pool.release(entity)
 
-            # Display the title and subtitle text
-            self.screen.blit(title_text_img, img_display_pos(title_text_img, (640, 225)))
-            self.screen.blit(subtitle_text_img, img_display_pos(subtitle_text_img, (640, 325)))
+    @property
+    def asteroids(self):
+        """
+        View of the asteroids in the game
+        """
+        return self.entities.view(Asteroid)
 
-            # Render and display the final score
-            score_text = "SCORE: {}".format(self.score)
-            score_text_img = self.title_font.render(score_text, True, (255, 255, 255))
-            self.screen.blit(score_text_img, img_display_pos(score_text_img, (640, 480)))
+    @property
+    def laser_beams(self):
+        """
+        View of the laser beams in the game
+        """
+        return self.entities.view(Laser)
 
-            # Render display new high score text if applicable
-            if new_highscore:
-                self.screen.blit(highscore_txt_img, img_display_pos(highscore_txt_img, (640, 600)))
+    def step_physics(self):
+        """
+        Method to integrate all of the sprites in the physics world, if the game is using one.
+        The collision grids are rebuilt afterwards as every sprite in the world has moved.
+        """
+        if self.physics is not None:
+            self.physics.step(self.dt * sprite.TIME_SCALE)
+            self.asteroid_grid.rebuild(self.asteroids)
+            self.laser_grid.rebuild(self.laser_beams)
 
-            # Render and display FPS
-            fps_text = str(round(self.clock.get_fps()))
-            fps_text_img = self.font.render(fps_text, True, (255, 255, 255))
-            self.screen.blit(fps_text_img, (1220, 20))
+    def add_asteroid(self, size, image, position, velocity, angular_velocity=0):
+        """
+        Method to add an asteroid to the game, taking one from the pool if there are any
+        The asteroid can be hit straight away, and is added to the entities when they're next flushed
+        (see spawner.WaveSpawner to add asteroids away from the rocket)
+        :param size:
+        :param image:
+        :param position:
+        :param velocity:
+        :param angular_velocity:
+        :return new_asteroid:
+        """
+        new_asteroid = self.asteroid_pool.acquire(size, image, position, velocity, angular_velocity)
+        self.entities.add(new_asteroid)
+        self.asteroid_grid.insert(new_asteroid)
+        return new_asteroid
+
+    def add_laser(self, start_pos, start_velocity, start_angle):
+        """
+        Method to add a laser beam to the game, taking one from the pool if there are any
+        :param start_pos:
+        :param start_velocity:
+        :param start_angle:
+        :return new_beam:
+        """
+        new_beam = self.laser_pool.acquire(start_pos, start_velocity, start_angle)
+        self.entities.add(new_beam)
+        self.laser_grid.insert(new_beam)
+        return new_beam
 
-            pygame.display.flip()  # display the screen updates
-            self.clock.tick(60)  # run at 60 FPS
 
-    def add_asteroid(self):
-        new_asteroid = Asteroid(self, 3)
-        self.asteroids.append(new_asteroid)
-        self.display_objects.append(new_asteroid)
+def entity_order(entity):
+    return entity.entity_id
 
 
 def img_display_pos(img, pos: tuple) -> tuple:
@@ -520,4 +934,45 @@ def img_display_pos(img, pos: tuple) -> tuple:
 
 
 if __name__ == "__main__":
-    Asteroids()
+    parser = argparse.ArgumentParser(description="Asteroids")
+    parser.add_argument("--numpy-physics", action="store_true",
+                        help="integrate asteroids and lasers together with the NumPy physics world")
+    parser.add_argument("--rotation-steps", type=int, default=360,
+                        help="number of angles per revolution to cache rotated sprite images at")
+    parser.add_argument("--rotation-cache-mb", type=float, default=ROTATION_CACHE_MB, metavar="MB",
+                        help="most MiB of rotated sprite images to cache")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only redraw the parts of the screen that change each frame")
+    parser.add_argument("--profile-trace", metavar="PATH",
+                        help="record each frame's timings and save them to PATH (.json for Chrome trace, else CSV)")
+    parser.add_argument("--trace-frames", type=int, default=profiler.TRACE_FRAMES, metavar="N",
+                        help="number of recent frames to keep in the trace saved by --profile-trace")
+    parser.add_argument("--physics-hz", type=float, default=60,
+                        help="number of times per second the game is updated, separately from the frame rate")
+    parser.add_argument("--max-steps-per-frame", type=int, default=5,
+                        help="most updates to run in one frame to catch up after a slow frame")
+    parser.add_argument("--wave-size", type=int, nargs=2, default=(1, 4), metavar=("MIN", "MAX"),
+                        help="fewest and most asteroids in each wave, e.g. 500 500 for a stress test")
+    parser.add_argument("--first-wave", type=int, default=3, help="number of asteroids at the start of each game")
+    parser.add_argument("--particles", type=int, default=PARTICLE_CAPACITY, metavar="N",
+                        help="most particles alive at once for explosions and exhaust, 0 to turn them off")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each step of starting the game took")
+    parser.add_argument("--no-texture-cache", action="store_true",
+                        help="cut and scale the textures on startup instead of loading the cached texture atlas")
+    parser.add_argument("--sort-by-texture", action="store_true",
+                        help="draw the sprites in each layer grouped by texture")
+    parser.add_argument("--seed", type=int, help="seed for the game's random number generator")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save a recording of the session to PATH when the game is closed (see replay.py)")
+    parser.add_argument("--name", default="PLAYER", help="name to save your scores under on the leaderboard")
+    args = parser.parse_args()
+
+    Asteroids(numpy_physics=args.numpy_physics, rotation_steps=args.rotation_steps,
+              rotation_cache_mb=args.rotation_cache_mb, dirty_rects=args.dirty_rects,
+              profile_trace=args.profile_trace, physics_hz=args.physics_hz,
+              max_steps_per_frame=args.max_steps_per_frame,
+              texture_cache=None if args.no_texture_cache else TEXTURE_CACHE_PATH,
+              sort_by_texture=args.sort_by_texture, seed=args.seed, record=args.record, player_name=args.name,
+              startup_report=args.startup_report, wave_size=args.wave_size, first_wave=args.first_wave,
+              particle_capacity=args.particles, trace_frames=args.trace_frames)
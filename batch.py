@@ -0,0 +1,210 @@
+"""
+Batch
+Runs many headless games across a pool of worker processes, to evaluate control policies for the rocket.
+
+A policy is made by a factory function taking a seed, and is called with the game on every tick the rocket is in
+play, steering it by calling the rocket's move_forward, turn_left, turn_right and fire methods. Each episode is one
+seeded game, played until the player runs out of lives or the tick limit is reached. Each worker process keeps one
+game and reuses it for every episode it runs.
+Run from the repository root with: python batch.py --episodes 1000 --policy random
+"""
+import argparse
+import importlib
+import multiprocessing
+import random
+import statistics
+import time
+
+import Asteroids
+
+
+def random_policy(seed, forward=0.5, turn=0.3, fire=0.1):
+    """
+    Function to make a policy that presses each control at random with the given probabilities
+
+    :param seed: seed for the policy's own random number generator
+    :param forward: chance of accelerating on each tick
+    :param turn: chance of turning on each tick, split evenly between left and right
+    :param fire: chance of firing on each tick
+    :return policy:
+    """
+    rng = random.Random(seed)
+
+    def policy(game):
+        rocket = game.rocket
+        if rng.random() < forward:
+            rocket.move_forward()
+        turning = rng.random()
+        if turning < turn / 2:
+            rocket.turn_left()
+        elif turning < turn:
+            rocket.turn_right()
+        if rng.random() < fire:
+            rocket.fire()
+
+    return policy
+
+
+def spinner_policy(seed, fire_every=10):
+    """
+    Function to make a policy that sits still, turning right and firing every few ticks
+
+    :param seed: unused, as the policy doesn't make any random choices
+    :param fire_every: number of ticks between shots
+    :return policy:
+    """
+    tick = 0
+
+    def policy(game):
+        nonlocal tick
+        game.rocket.turn_right()
+        if tick % fire_every == 0:
+            game.rocket.fire()
+        tick += 1
+
+    return policy
+
+
+def idle_policy(seed):
+    """
+    Function to make a policy that does nothing, as a baseline for the others
+    :param seed:
+    :return policy:
+    """
+    return lambda game: None
+
+
+POLICIES = {"random": random_policy, "spinner": spinner_policy, "idle": idle_policy}
+
+
+def load_policy(name):
+    """
+    Function to return a policy factory by name, either one of POLICIES or the path of a function in another
+    module written as "module:function"
+
+    :param name:
+    :return policy_factory:
+    """
+    if name in POLICIES:
+        return POLICIES[name]
+    if ":" not in name:
+        raise ValueError("unknown policy {!r}, expected one of {} or module:function".format(name, sorted(POLICIES)))
+    module_name, function_name = name.split(":", 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+_game = None  # The game each worker process runs its episodes in
+
+
+def _init_worker(numpy_physics):
+    """
+    Function to create the game a worker process runs its episodes in
+    :param numpy_physics:
+    """
+    global _game
+    _game = Asteroids.Asteroids(numpy_physics=numpy_physics, headless=True)
+
+
+def run_episode(task):
+    """
+    Function to play one game with a policy in the worker's game, and return statistics about it
+
+    :param task: tuple of (policy name, seed, max ticks, dt)
+    :return result: dictionary of seed, score, ticks, survival_time (simulated seconds), seconds (real time taken)
+        and finished (True if the game ended before the tick limit)
+    """
+    policy_name, seed, max_ticks, dt = task
+    game = _game
+    policy = load_policy(policy_name)(seed)
+
+    # Reset explicitly, as the worker's last episode may have been cut off in any scene, even part way through a
+    #   respawn
+    game.reset(seed)
+    game.dt = dt
+
+    start = time.perf_counter()
+    ticks = 0
+    while ticks < max_ticks and game.scene != Asteroids.GAME_OVER:
+        if game.scene == Asteroids.PLAYING:
+            policy(game)
+        game.tick(0)
+        ticks += 1
+    seconds = time.perf_counter() - start
+
+    return {"seed": seed, "score": game.score, "ticks": ticks, "survival_time": ticks * dt, "seconds": seconds,
+            "finished": game.scene == Asteroids.GAME_OVER}
+
+
+def run_batch(episodes, policy="random", processes=None, seed=0, max_ticks=36000, dt=1 / 60, numpy_physics=False):
+    """
+    Function to play a number of episodes with a policy across a pool of worker processes
+
+    :param episodes: number of games to play
+    :param policy: name of the policy, as taken by load_policy
+    :param processes: number of worker processes, or None for one per CPU
+    :param seed: seed of the first episode, each of the others using the next seed
+    :param max_ticks: most ticks to play each episode for
+    :param dt: length of each tick in seconds
+    :param numpy_physics: if True, the games use the NumPy physics world
+    :return (results, summary): the result of each episode, and the summary from summarise
+    """
+    load_policy(policy)  # Check the policy exists before starting the workers
+    tasks = [(policy, seed + episode, max_ticks, dt) for episode in range(episodes)]
+    processes = processes or multiprocessing.cpu_count()
+
+    start = time.perf_counter()
+    workers = multiprocessing.Pool(processes, _init_worker, (numpy_physics,))
+    results = workers.map(run_episode, tasks, chunksize=max(1, episodes // (processes * 4)))
+    # Let the workers exit by themselves, as SDL catches the SIGTERM that Pool.terminate would send them
+    workers.close()
+    workers.join()
+    seconds = time.perf_counter() - start
+
+    return results, summarise(results, seconds, processes)
+
+
+def summarise(results, seconds, processes):
+    """
+    Function to aggregate the results of a batch of episodes
+
+    :param results: list of episode results from run_episode
+    :param seconds: real time the whole batch took
+    :param processes: number of worker processes used
+    :return summary: dictionary of statistics for the batch
+    """
+    scores = [result["score"] for result in results]
+    survival_times = [result["survival_time"] for result in results]
+    ticks = sum(result["ticks"] for result in results)
+    return {"episodes": len(results), "processes": processes, "seconds": seconds,
+            "mean_score": statistics.fmean(scores), "median_score": statistics.median(scores),
+            "min_score": min(scores), "max_score": max(scores),
+            "mean_survival_time": statistics.fmean(survival_times),
+            "finished": sum(result["finished"] for result in results),
+            "ticks": ticks, "ticks_per_second": ticks / seconds,
+            "episodes_per_hour": len(results) / seconds * 3600}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless games of Asteroids in parallel to evaluate a "
+                                                 "control policy")
+    parser.add_argument("--episodes", type=int, default=100, help="number of games to play")
+    parser.add_argument("--policy", default="random",
+                        help="one of {} or module:function of a policy factory".format(", ".join(sorted(POLICIES))))
+    parser.add_argument("--processes", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--max-ticks", type=int, default=36000, help="most ticks to play each episode for")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="length of each tick in seconds")
+    parser.add_argument("--numpy-physics", action="store_true", help="use the NumPy physics world")
+    args = parser.parse_args()
+
+    results, summary = run_batch(args.episodes, args.policy, args.processes, args.seed, args.max_ticks, args.dt,
+                                 args.numpy_physics)
+    print("{episodes} episodes on {processes} processes in {seconds:.2f} s "
+          "({episodes_per_hour:.0f} episodes/hour, {ticks_per_second:.0f} ticks/s)".format(**summary))
+    print("score: mean {mean_score:.1f}, median {median_score}, min {min_score}, max {max_score}".format(**summary))
+    print("survival: mean {mean_survival_time:.1f} s, {finished} of {episodes} games ended "
+          "before the tick limit".format(**summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the game's hot paths.
+Run from the repository root, e.g. python -m benchmarks.vector_bench
+python -m benchmarks.suite runs the whole suite and compares it with the stored baseline.
+"""
@@ -0,0 +1,118 @@
+"""
+Benchmark comparing the brute force collision loops with the spatial hash broad phase.
+
+For each asteroid count, a field of asteroids and a volley of lasers is placed randomly on the screen at random angles,
+and the time taken to find every laser/asteroid hit is measured both ways, with the pixel mask narrow phase testing
+each pair found. The hits found by each method are checked to be the same. The best of three runs is reported, so the
+masks are already cached.
+Run from the repository root with: python -m benchmarks.collision_bench
+"""
+import math
+import random
+import time
+
+import Asteroids
+import collision
+import sprite
+import vector as v
+
+SCREEN_DIMS = (1280, 720)
+ASTEROID_COUNTS = (10, 100, 1000, 10000)
+LASER_COUNT = 50
+ASTEROID_SCALES = ((100, 100), (150, 150), (200, 200))
+
+
+class BenchSprite(sprite.Sprite):
+    """
+    Sprite with only the state needed for collision checks, so thousands can be made without a physics world or pool
+    """
+
+    def __init__(self, game, image, position, scale, angle):
+        self.game = game
+        self.body = None
+        self.spatial_hash = None
+        self.scale = scale
+        self.collision_image = game.rotation_cache.get_scaled(image, scale)
+        self.radius = math.hypot(scale[0], scale[1]) / 2
+        self._position = v.vector2(position[0], position[1])
+        self._angle = angle
+
+
+def make_field(game, count, rng, names, scales):
+    """
+    Function to return a list of randomly placed and rotated sprites
+    :param game: headless game to take the textures and mask cache from
+    :param count:
+    :param rng:
+    :param names: names of the textures to choose from
+    :param scales: sizes to choose from
+    :return sprites:
+    """
+    return [BenchSprite(game, game.sprite_images[rng.choice(names)],
+                        (rng.uniform(0, SCREEN_DIMS[0]), rng.uniform(0, SCREEN_DIMS[1])), rng.choice(scales),
+                        rng.uniform(0, 2 * math.pi))
+            for i in range(count)]
+
+
+def brute_force(lasers, asteroids):
+    """
+    Function to find the hits by checking every laser against every asteroid
+    :param lasers:
+    :param asteroids:
+    :return hits:
+    """
+    return [(i, j) for i, laser in enumerate(lasers) for j, asteroid in enumerate(asteroids)
+            if laser.check_collision(asteroid)]
+
+
+def broad_phase(lasers, asteroids):
+    """
+    Function to find the hits by rebuilding a spatial hash and querying it with each laser
+    :param lasers:
+    :param asteroids:
+    :return hits:
+    """
+    grid = collision.SpatialHash()
+    grid.rebuild(asteroids)
+    index = {asteroid: j for j, asteroid in enumerate(asteroids)}
+    return [(i, index[asteroid]) for i, laser in enumerate(lasers)
+            for asteroid in grid.query_rect(laser.bounds()) if laser.check_collision(asteroid)]
+
+
+def best_time(function, *args, repeat=3):
+    """
+    Function to return the best time in seconds and the result of calling function with args
+    :param function:
+    :param args:
+    :param repeat:
+    :return (seconds, result):
+    """
+    best = None
+    result = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rng = random.Random(0)
+    game = Asteroids.Asteroids(headless=True)
+    print("{:>10}{:>16}{:>16}{:>10}{:>8}".format("asteroids", "brute force ms", "spatial hash ms", "speedup", "hits"))
+    for count in ASTEROID_COUNTS:
+        asteroids = make_field(game, count, rng, ("asteroid1", "asteroid2", "asteroid3"), ASTEROID_SCALES)
+        lasers = make_field(game, LASER_COUNT, rng, ("laser",), (Asteroids.LASER_SCALE,))
+
+        brute_time, brute_hits = best_time(brute_force, lasers, asteroids)
+        hash_time, hash_hits = best_time(broad_phase, lasers, asteroids)
+        if sorted(brute_hits) != sorted(hash_hits):
+            raise AssertionError("Spatial hash hits differ from brute force at {} asteroids".format(count))
+
+        print("{:>10}{:>16.3f}{:>16.3f}{:>9.1f}x{:>8}".format(count, brute_time * 1000, hash_time * 1000,
+                                                             brute_time / hash_time, len(brute_hits)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Benchmark suite for the game's hot paths, compared against a stored baseline.
+
+Runs headlessly with SDL's dummy video driver and times vector arithmetic, sprite updates and screen wrapping,
+collision checks and the laser/asteroid loops at a range of asteroid counts, drawing sprites, moving and drawing a
+full particle system, rendering HUD text and cutting the textures out of the texture image. Each result is the best
+time for one call in microseconds.
+
+The results are compared with benchmarks/baseline.json, and the suite exits with status 1 if any benchmark is slower
+than its baseline by more than the threshold (25% unless the baseline sets another for it). Timings depend on the
+machine, so save a baseline on the machine the suite is run on before relying on the comparison.
+Run from the repository root with: python -m benchmarks.suite [--output results.json] [--save-baseline]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import timeit
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # Keep standard output clean for --output -
+import pygame
+
+import Asteroids
+import collision
+import image_loader
+import particles
+import vector as v
+from benchmarks import collision_bench
+
+RESULTS_VERSION = 1
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+SPRITE_COUNTS = (100, 1000)
+ASTEROID_COUNTS = (10, 100, 1000)
+LASER_COUNT = 50
+DRAW_COUNT = 100
+PARTICLE_COUNT = 10000
+
+
+def vector_benchmarks(game):
+    """
+    Function to return the vector2 operations the sprites use every tick
+    :param game:
+    :return benchmarks: dictionary of name to a function taking no arguments
+    """
+    position = v.vector2(640, 360)
+    velocity = v.vector2(7.5, -3.25)
+    dt = 0.16
+
+    def construct():
+        v.vector2(3, 4)
+
+    def add():
+        position + velocity
+
+    def scalar_mul():
+        velocity * dt
+
+    def unit():
+        v.vector2(7.5, -3.25).unit
+
+    return {"vector.construct": construct, "vector.add": add, "vector.scalar_mul": scalar_mul, "vector.unit": unit}
+
+
+def sprite_benchmarks(game):
+    """
+    Function to return benchmarks of Sprite.update and Sprite.check_edges over fields of asteroids
+    The asteroids are integrated by Sprite.update and moved around the collision grid as they are in the game.
+
+    :param game:
+    :return benchmarks:
+    """
+    game.clear_objects()
+    field = game.spawner.spawn(max(SPRITE_COUNTS))
+    game.flush_entities()
+
+    benchmarks = {}
+    for count in SPRITE_COUNTS:
+        asteroids = field[:count]
+
+        def update(asteroids=asteroids):
+            for asteroid in asteroids:
+                asteroid.update()
+
+        def check_edges(asteroids=asteroids):
+            for asteroid in asteroids:
+                asteroid.check_edges()
+
+        benchmarks["sprite.update[{}]".format(count)] = update
+        benchmarks["sprite.check_edges[{}]".format(count)] = check_edges
+    return benchmarks
+
+
+def collision_benchmarks(game):
+    """
+    Function to return benchmarks of Sprite.check_collision on its own, and of finding every laser/asteroid hit with
+    the collision grid and with every pair checked, at each asteroid count
+    The masks are made by the first call, so the times are for the cached masks.
+
+    :param game:
+    :return benchmarks:
+    """
+    rng = random.Random(0)
+    asteroid_names = ("asteroid1", "asteroid2", "asteroid3")
+    asteroid_scales = tuple(Asteroids.ASTEROID_SCALES.values())
+    laser_names = ("laser",)
+    laser_scales = (Asteroids.LASER_SCALE,)
+
+    # A laser touching an asteroid's edge, which goes through to the masks, and a laser far away, which doesn't
+    asteroid = collision_bench.BenchSprite(game, game.sprite_images["asteroid1"], (640, 360), (200, 200), 0.5)
+    near_laser = collision_bench.BenchSprite(game, game.sprite_images["laser"], (640, 275), Asteroids.LASER_SCALE, 0)
+    far_laser = collision_bench.BenchSprite(game, game.sprite_images["laser"], (100, 100), Asteroids.LASER_SCALE, 0)
+    benchmarks = {"collision.check_collision.mask": lambda: near_laser.check_collision(asteroid),
+                  "collision.check_collision.reject": lambda: far_laser.check_collision(asteroid)}
+
+    for count in ASTEROID_COUNTS:
+        asteroids = collision_bench.make_field(game, count, rng, asteroid_names, asteroid_scales)
+        lasers = collision_bench.make_field(game, LASER_COUNT, rng, laser_names, laser_scales)
+        grid = collision.SpatialHash()
+        grid.rebuild(asteroids)
+
+        def grid_loop(lasers=lasers, grid=grid):
+            for laser in lasers:
+                [asteroid for asteroid in grid.query_rect(laser.bounds()) if laser.check_collision(asteroid)]
+
+        benchmarks["collision.lasers_grid[{}]".format(count)] = grid_loop
+        benchmarks["collision.lasers_brute_force[{}]".format(count)] = (
+            lambda lasers=lasers, asteroids=asteroids: collision_bench.brute_force(lasers, asteroids))
+    return benchmarks
+
+
+def draw_benchmarks(game):
+    """
+    Function to return a benchmark of drawing a field of asteroids at random angles and submitting the draws
+    :param game:
+    :return benchmarks:
+    """
+    rng = random.Random(0)
+    game.clear_objects()
+    asteroids = game.spawner.spawn(DRAW_COUNT)
+    game.flush_entities()
+    for asteroid in asteroids:
+        asteroid.angle = rng.uniform(0, 2 * math.pi)
+
+    def draw():
+        game.renderer.begin_frame()
+        for asteroid in asteroids:
+            asteroid.draw()
+        game.renderer.submit()
+
+    return {"draw.asteroids[{}]".format(DRAW_COUNT): draw}
+
+
+def particle_benchmarks(game):
+    """
+    Function to return benchmarks of updating and drawing a particle system full of particles
+    The particles live far longer than the benchmarks run, so none die and the system stays full.
+
+    :param game:
+    :return benchmarks:
+    """
+    system = particles.ParticleSystem(game.screen, PARTICLE_COUNT, seed=0)
+    system.emit(PARTICLE_COUNT, (640, 360), (0, 0), particles.EXPLOSION_SPEEDS, (1e9, 1e9),
+                particles.EXPLOSION_COLOURS, radius=400)
+    system.update(1 / 60)
+
+    def draw():
+        game.renderer.begin_frame()
+        system.draw(game.renderer, 0.5)
+        game.renderer.submit()
+
+    return {"particles.update[{}]".format(PARTICLE_COUNT): lambda: system.update(1 / 60),
+            "particles.draw[{}]".format(PARTICLE_COUNT): draw}
+
+
+def text_benchmarks(game):
+    """
+    Function to return benchmarks of rendering the HUD text without the text cache
+    :param game:
+    :return benchmarks:
+    """
+    return {"font.render.hud": lambda: game.font.render("LIVES: 3     SCORE: 123450", True, (255, 255, 255)),
+            "font.render.title": lambda: game.title_font.render("GAME OVER", True, (255, 255, 255))}
+
+
+def asset_benchmarks(game):
+    """
+    Function to return a benchmark of cutting the textures out of the texture image
+    :param game:
+    :return benchmarks:
+    """
+    return {"assets.get_textures": lambda: image_loader.get_textures(Asteroids.TEXTURE_PATH, Asteroids.TEXTURE_INDEX)}
+
+
+BENCHMARK_GROUPS = (vector_benchmarks, sprite_benchmarks, collision_benchmarks, draw_benchmarks, particle_benchmarks,
+                    text_benchmarks, asset_benchmarks)
+
+
+def time_call(function, repeat=5, min_time=0.1):
+    """
+    Function to return the best time for a single call of function in microseconds
+    Each repeat calls the function enough times to take at least min_time seconds.
+
+    :param function:
+    :param repeat:
+    :param min_time:
+    :return us:
+    """
+    timer = timeit.Timer(function)
+    function()  # Fill any caches before timing
+    number = 1
+    while timer.timeit(number) < min_time:
+        number = number * 5 // 2 if str(number)[0] == "2" else number * 2  # 1, 2, 5, 10, 20, 50...
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def run(pattern=None, repeat=5, min_time=0.1):
+    """
+    Function to run every benchmark whose name contains pattern
+
+    :param pattern: text to filter the benchmarks by, or None to run them all
+    :param repeat:
+    :param min_time:
+    :return results: dictionary of benchmark name to microseconds per call
+    """
+    game = Asteroids.Asteroids(headless=True, seed=0)
+    results = {}
+    for group in BENCHMARK_GROUPS:
+        for name, function in group(game).items():
+            if pattern is None or pattern in name:
+                results[name] = time_call(function, repeat, min_time)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Function to compare results with a baseline
+
+    :param results: dictionary of benchmark name to microseconds per call
+    :param baseline: baseline dictionary as saved by save_baseline
+    :return comparisons: list of (name, us, baseline us or None, ratio or None, regressed) in the order of results
+    """
+    thresholds = baseline.get("thresholds", {})
+    default_threshold = baseline.get("threshold", DEFAULT_THRESHOLD)
+    comparisons = []
+    for name, us in results.items():
+        baseline_us = baseline.get("results", {}).get(name)
+        if baseline_us is None:
+            comparisons.append((name, us, None, None, False))
+            continue
+        ratio = us / baseline_us
+        comparisons.append((name, us, baseline_us, ratio, ratio > 1 + thresholds.get(name, default_threshold)))
+    return comparisons
+
+
+def environment():
+    """
+    Function to return a description of the machine and versions the results were measured with
+    :return environment:
+    """
+    return {"python": platform.python_version(), "pygame": pygame.version.ver, "machine": platform.machine(),
+            "system": platform.system(), "processor": platform.processor()}
+
+
+def save_baseline(path, results, previous=None):
+    """
+    Function to save results as the baseline, keeping the thresholds of the previous baseline
+    :param path:
+    :param results:
+    :param previous: the baseline being replaced, if there was one
+    """
+    previous = previous or {}
+    baseline = {"version": RESULTS_VERSION, "environment": environment(),
+                "threshold": previous.get("threshold", DEFAULT_THRESHOLD),
+                "thresholds": previous.get("thresholds", {}), "results": results}
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths against a stored baseline")
+    parser.add_argument("--filter", metavar="TEXT", help="only run the benchmarks whose names contain TEXT")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of timed runs of each benchmark to take the best of")
+    parser.add_argument("--min-time", type=float, default=0.1, help="least seconds each timed run lasts")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON to PATH, or - for standard output")
+    parser.add_argument("--baseline", metavar="PATH", default=BASELINE_PATH, help="baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    args = parser.parse_args()
+
+    results = run(args.filter, args.repeat, args.min_time)
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = None
+    comparisons = compare(results, baseline or {})
+    regressions = [name for name, us, baseline_us, ratio, regressed in comparisons if regressed]
+
+    if args.output is not None:
+        output = {"version": RESULTS_VERSION, "environment": environment(), "results": results,
+                  "comparison": {name: {"us": us, "baseline_us": baseline_us, "ratio": ratio, "regressed": regressed}
+                                 for name, us, baseline_us, ratio, regressed in comparisons},
+                  "regressions": regressions}
+        if args.output == "-":
+            json.dump(output, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.output, "w") as f:
+                json.dump(output, f, indent=2)
+
+    if args.output != "-":
+        print("{:<40}{:>14}{:>14}{:>9}".format("benchmark", "us", "baseline us", "ratio"))
+        for name, us, baseline_us, ratio, regressed in comparisons:
+            if baseline_us is None:
+                print("{:<40}{:>14.3f}{:>14}{:>9}".format(name, us, "-", "-"))
+            else:
+                print("{:<40}{:>14.3f}{:>14.3f}{:>8.2f}x{}".format(name, us, baseline_us, ratio,
+                                                                  "  REGRESSION" if regressed else ""))
+
+    if args.save_baseline:
+        if args.filter is not None and baseline is not None:
+            # Keep the baseline of the benchmarks that weren't run
+            results = dict(baseline.get("results", {}), **results)
+        save_baseline(args.baseline, results, baseline)
+        print("saved baseline to {}".format(args.baseline), file=sys.stderr)
+    elif regressions:
+        print("{} benchmark(s) slower than the baseline: {}".format(len(regressions), ", ".join(regressions)),
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
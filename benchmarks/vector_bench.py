@@ -0,0 +1,113 @@
+"""
+Micro-benchmark comparing the original vector class with the compact vector2 class.
+
+Reports ns/op, vector objects created per op and bytes per vector object for the operations the sprites use every
+frame.
+Run from the repository root with: python -m benchmarks.vector_bench
+"""
+import math
+import sys
+import timeit
+
+import vector as v
+
+
+def make_ops(cls):
+    """
+    Function to build a dictionary of benchmark operations for the vector class passed in as cls
+    :param cls:
+    :return ops:
+    """
+    position = cls(640, 360)
+    velocity = cls(7.5, -3.25)
+    acceleration = cls(0.5, 0.25)
+    dt = 0.16
+
+    def construct():
+        cls(3, 4)
+
+    def add():
+        position + velocity
+
+    def scalar_mul():
+        velocity * dt
+
+    def drag():
+        velocity.unit * (-0.4)
+
+    def sprite_update():
+        # Mirrors Sprite.update: two integration steps and the direction vector from the angle setter
+        new_position = position + velocity * dt
+        new_velocity = velocity + acceleration * dt
+        direction = cls(math.sin(0.3), -math.cos(0.3))
+        return new_position, new_velocity, direction
+
+    return {"construct": construct, "add": add, "scalar_mul": scalar_mul, "drag": drag,
+            "sprite_update": sprite_update}
+
+
+def count_allocations(cls, op):
+    """
+    Function to count how many vector objects a single call of op creates
+    :param cls:
+    :param op:
+    :return count:
+    """
+    count = 0
+    original_init = cls.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal count
+        count += 1
+        original_init(self, *args, **kwargs)
+
+    cls.__init__ = counting_init
+    try:
+        op()
+    finally:
+        cls.__init__ = original_init
+    return count
+
+
+def object_size(obj):
+    """
+    Function to return the size in bytes of a vector object, including its instance dictionary if it has one
+    :param obj:
+    :return size:
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def time_op(op, number):
+    """
+    Function to return the best time for a single call of op in nanoseconds
+    :param op:
+    :param number:
+    :return ns:
+    """
+    return min(timeit.repeat(op, number=number, repeat=5)) / number * 1e9
+
+
+def main(number=100000):
+    results = {}
+    for cls in (v.vector, v.vector2):
+        ops = make_ops(cls)
+        results[cls.__name__] = {name: (time_op(op, number), count_allocations(cls, op)) for name, op in ops.items()}
+
+    print("{:<14}{:>14}{:>14}{:>10}{:>10}{:>9}".format("op", "vector ns", "vector2 ns", "allocs", "allocs2",
+                                                      "speedup"))
+    for name in results["vector"]:
+        old_ns, old_allocs = results["vector"][name]
+        new_ns, new_allocs = results["vector2"][name]
+        print("{:<14}{:>14.1f}{:>14.1f}{:>10}{:>10}{:>8.2f}x".format(name, old_ns, new_ns, old_allocs, new_allocs,
+                                                                    old_ns / new_ns))
+
+    print()
+    print("bytes per object: vector {}, vector2 {}".format(object_size(v.vector(3, 4)), object_size(v.vector2(3, 4))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Collision
+Uniform grid broad phase and pixel mask narrow phase for collision detection.
+
+Sprites are stored in every grid cell their bounding box overlaps, so a collision query only has to test the few
+sprites sharing a cell with the area being tested instead of every sprite in the game. The sprites it finds are then
+tested with Sprite.check_collision, which compares the opaque pixels of the two sprites as they're drawn, using
+bitmasks that are made once for each texture, size and rotation step and shared by every sprite.
+"""
+import time
+from collections import OrderedDict
+
+import pygame
+
+
+class SpatialHash:
+    """
+    Class to store sprites in a uniform grid of square cells, keyed by cell coordinates
+    Each sprite's bounding box is calculated once when it's inserted or moved, and reused by every query
+    """
+
+    def __init__(self, cell_size=200, order_key=None):
+        """
+        Constructor method for the spatial hash.
+
+        :param cell_size: width and height of each grid cell in pixels
+        :param order_key: if given, query results are sorted by this function of each sprite, so they don't depend on
+            the order the sprites were added to or moved around the grid
+        """
+        self.cell_size = cell_size
+        self.order_key = order_key
+        self.cells = {}  # Maps (column, row) to a dictionary of {sprite: bounds} for sprites overlapping the cell
+        self.entries = {}  # Maps each sprite to its (bounds, cells)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, sprite):
+        return sprite in self.entries
+
+    def clear(self):
+        """
+        Method to remove every sprite from the grid
+        """
+        for sprite in self.entries:
+            sprite.spatial_hash = None
+        self.cells = {}
+        self.entries = {}
+
+    def rebuild(self, sprites):
+        """
+        Method to clear the grid and insert every sprite passed in
+
+        :param sprites:
+        """
+        self.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def insert(self, sprite):
+        """
+        Method to add a sprite to every cell its bounding box overlaps
+
+        :param sprite:
+        """
+        bounds = sprite.bounds()
+        cells = self._cells_for(bounds)
+        for cell in cells:
+            contents = self.cells.get(cell)
+            if contents is None:
+                contents = self.cells[cell] = {}
+            contents[sprite] = bounds
+
+        self.entries[sprite] = (bounds, cells)
+        sprite.spatial_hash = self
+
+    def remove(self, sprite):
+        """
+        Method to remove a sprite from the grid
+
+        :param sprite:
+        """
+        bounds, cells = self.entries.pop(sprite)
+        for cell in cells:
+            contents = self.cells[cell]
+            del contents[sprite]
+            if not contents:
+                del self.cells[cell]
+
+        sprite.spatial_hash = None
+
+    def move(self, sprite):
+        """
+        Method to update the grid after a sprite has moved
+
+        :param sprite:
+        """
+        bounds = sprite.bounds()
+        old_bounds, cells = self.entries[sprite]
+        # The sprite is still in the same cells if its first and last cells are the same
+        size = self.cell_size
+        left, top, right, bottom = bounds
+        if (cells[0] == (int(left // size), int(top // size))
+                and cells[-1] == (int(right // size), int(bottom // size))):
+            for cell in cells:
+                self.cells[cell][sprite] = bounds
+            self.entries[sprite] = (bounds, cells)
+        else:
+            self.remove(sprite)
+            self.insert(sprite)
+
+    def query_rect(self, bounds):
+        """
+        Method to return a list of the sprites whose bounding boxes overlap a bounding box, each listed once
+
+        :param bounds: (left, top, right, bottom)
+        :return hits:
+        """
+        left, top, right, bottom = bounds
+        hits = {}
+        for cell in self._cells_for(bounds):
+            contents = self.cells.get(cell)
+            if contents is None:
+                continue
+            for sprite, (other_left, other_top, other_right, other_bottom) in contents.items():
+                if other_left < right and left < other_right and other_top < bottom and top < other_bottom:
+                    hits[sprite] = None
+        hits = list(hits)
+        if self.order_key is not None and len(hits) > 1:
+            hits.sort(key=self.order_key)
+        return hits
+
+    def _cells_for(self, bounds):
+        """
+        Method to return a tuple of the cells overlapped by a bounding box
+
+        :param bounds: (left, top, right, bottom)
+        :return cells:
+        """
+        size = self.cell_size
+        left, top, right, bottom = bounds
+        first_column, last_column = int(left // size), int(right // size)
+        first_row, last_row = int(top // size), int(bottom // size)
+        return tuple((column, row) for column in range(first_column, last_column + 1)
+                     for row in range(first_row, last_row + 1))
+
+
+class MaskCache:
+    """
+    Class to cache a bitmask of the opaque pixels of each rotated texture, for pixel accurate collisions
+    Masks are made with the angle rounded to the rotation cache's steps, so a sprite's mask always matches the image
+    it's drawn with, and are shared by every sprite using the texture at that size. warm makes every rotation's mask
+    ahead of time, so masks don't have to be made during play. The least recently used masks are dropped once the
+    cache holds more than max_bytes of them.
+
+    Masks are made by rotating an 8-bit copy of the texture's opaque pixels rather than the texture itself, which
+    gives the same mask in less than half the time.
+    """
+
+    def __init__(self, rotation_cache, max_bytes=32 * 1024 * 1024):
+        """
+        Constructor method for the mask cache.
+
+        :param rotation_cache: the game's render.RotationCache
+        :param max_bytes: maximum size of the cached masks in bytes
+        """
+        self.rotation_cache = rotation_cache
+        self.max_bytes = max_bytes
+        self.size = 0  # Bytes of mask data currently cached
+        self.masks = OrderedDict()  # Maps (scaled texture, step) to the mask of the rotated texture, least recent first
+        self.silhouettes = {}  # Maps each scaled texture to an 8-bit copy of its opaque pixels
+
+    def __len__(self):
+        return len(self.masks)
+
+    def get(self, image, angle):
+        """
+        Method to return the mask of image rotated by angle, rounded to the nearest step
+
+        :param image: a scaled texture, as returned by RotationCache.get_scaled
+        :param angle: angle in radians clockwise
+        :return mask:
+        """
+        key = (image, self.rotation_cache.step(angle))
+        mask = self.masks.get(key)
+        if mask is not None:
+            self.masks.move_to_end(key)
+            return mask
+
+        mask = self._make(image, key[1])
+        self._add(key, mask)
+        while self.size > self.max_bytes and len(self.masks) > 1:
+            old_key, old_mask = self.masks.popitem(last=False)
+            self.size -= self._bytes(old_mask)
+        return mask
+
+    def warm(self, textures, time_limit=None):
+        """
+        Method to make the mask of every rotation of the textures passed in, stopping if the cache gets full.
+        With a time limit, the cache can be warmed a little at a time by calling this again until it returns True.
+
+        :param textures: sequence of (texture, scale) pairs, in the order to warm them
+        :param time_limit: seconds to stop after, or None to warm every texture
+        :return finished: True if every mask is cached or the cache is full
+        """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        for image, scale in textures:
+            scaled_image = self.rotation_cache.get_scaled(image, scale)
+            for step in range(self.rotation_cache.steps):
+                key = (scaled_image, step)
+                if key in self.masks:
+                    continue
+                if deadline is not None and time.perf_counter() > deadline:
+                    return False
+                mask = self._make(scaled_image, step)
+                if self.size + self._bytes(mask) > self.max_bytes:
+                    return True
+                self._add(key, mask)
+        return True
+
+    def _make(self, image, step):
+        """
+        Method to make the mask of a scaled texture rotated by a number of steps clockwise
+
+        :param image:
+        :param step:
+        :return mask:
+        """
+        silhouette = self.silhouettes.get(image)
+        if silhouette is None:
+            # Opaque pixels are colour 1 and the rest colour 0, the colour key, so rotating it fills the corners with 0
+            silhouette = self.silhouettes[image] = pygame.Surface(image.get_size(), depth=8)
+            silhouette.set_palette([(0, 0, 0), (255, 255, 255)])
+            pygame.mask.from_surface(image).to_surface(silhouette, setcolor=(255, 255, 255), unsetcolor=(0, 0, 0))
+            silhouette.set_colorkey(0)
+        return pygame.mask.from_surface(self.rotation_cache.rotate(silhouette, step))
+
+    def _add(self, key, mask):
+        self.masks[key] = mask
+        self.size += self._bytes(mask)
+
+    @staticmethod
+    def _bytes(mask):
+        width, height = mask.get_size()
+        return (width + 7) // 8 * height
@@ -0,0 +1,111 @@
+"""
+Entities
+Registry of the sprites in a running game.
+
+Every entity gets a stable ID when it's added. Entities added or removed while the game is being updated are only
+marked, and the registry itself is changed when flush is called at the end of the tick, so it's always safe to
+iterate over while updating.
+"""
+
+
+class EntityRegistry:
+    """
+    Class to hold the game's entities, with a view of each type of entity
+    Entities are stored in dictionaries keyed by ID, so removing one doesn't have to search a list.
+    """
+
+    def __init__(self):
+        self.next_id = 0
+        self.entities = {}  # Maps ID to entity, in the order the entities were added
+        self.views = {}  # Maps each entity class to a dictionary of {ID: entity} for that class
+        self.pending_add = []
+        self.pending_removal = []
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities.values())
+
+    def add(self, entity, entity_id=None):
+        """
+        Method to give an entity an ID and add it to the registry at the end of the tick
+
+        :param entity:
+        :param entity_id: ID to give the entity, used when restoring a saved game; the next free ID if None
+        :return entity_id:
+        """
+        if entity_id is None:
+            entity_id = self.next_id
+            self.next_id += 1
+        entity.entity_id = entity_id
+        entity.alive = True
+        self.pending_add.append(entity)
+        return entity.entity_id
+
+    def remove(self, entity):
+        """
+        Method to mark an entity as dead and remove it from the registry at the end of the tick
+
+        :param entity:
+        """
+        if entity.alive:
+            entity.alive = False
+            self.pending_removal.append(entity)
+
+    def flush(self):
+        """
+        Method to apply the additions and removals made since the last flush
+
+        :return removed: list of the entities removed from the registry
+        """
+        for entity in self.pending_add:
+            self.entities[entity.entity_id] = entity
+            self._view_dict(type(entity))[entity.entity_id] = entity
+        self.pending_add = []
+
+        removed = self.pending_removal
+        self.pending_removal = []
+        for entity in removed:
+            del self.entities[entity.entity_id]
+            del self.views[type(entity)][entity.entity_id]
+        return removed
+
+    def clear(self):
+        """
+        Method to remove every entity straight away
+
+        :return removed: list of the entities that were in the registry or waiting to be added
+        """
+        removed = list(self.entities.values()) + self.pending_add
+        for entity in removed:
+            entity.alive = False
+        self.entities = {}
+        self.views = {}
+        self.pending_add = []
+        self.pending_removal = []
+        return removed
+
+    def get(self, entity_id):
+        """
+        Method to return the entity with the given ID, or None if there isn't one
+
+        :param entity_id:
+        :return entity:
+        """
+        return self.entities.get(entity_id)
+
+    def view(self, cls):
+        """
+        Method to return a live view of the entities of one class
+
+        :param cls:
+        :return entities:
+        """
+        return self._view_dict(cls).values()
+
+    def _view_dict(self, cls):
+        view = self.views.get(cls)
+        if view is None:
+            view = self.views[cls] = {}
+        return view
@@ -0,0 +1,197 @@
+"""
+Env
+Gym style environment API stepping a batch of independent headless games in lockstep.
+
+Each call to step takes one action per game, as bit flags made from Asteroids.FORWARD, TURN_LEFT, TURN_RIGHT and
+FIRE, and advances every game by one tick. Observations are written into NumPy arrays that are allocated once, so the
+same arrays are returned by every call and are overwritten by the next one (copy them to keep them):
+    rocket      (K, 6)        x, y, vx, vy, angle, angular velocity
+    asteroids   (K, A, 7)     x, y, vx, vy, angle, angular velocity, size
+    lasers      (K, L, 6)     x, y, vx, vy, angle, angular velocity
+    asteroid_mask (K, A) and laser_mask (K, L) mark the rows in use
+If a game has more than A asteroids or L lasers, only the first A or L are observed.
+A game that ends is started again straight away with the next seed, and its final score is passed back in the info.
+Nothing is drawn unless render is called.
+"""
+
+import numpy as np
+
+import Asteroids
+
+ROCKET_FEATURES = 6
+ASTEROID_FEATURES = 7
+LASER_FEATURES = 6
+
+
+class VectorEnv:
+    """
+    Class to step a batch of games together and return their states as arrays
+    """
+
+    def __init__(self, num_envs, seed=0, max_asteroids=64, max_lasers=32, dt=1 / 60, max_ticks=None,
+                 numpy_physics=False):
+        """
+        Constructor method for the environment.
+
+        :param num_envs: number of games to step together
+        :param seed: seed of the first game, each of the others using the next seed
+        :param max_asteroids: most asteroids observed in each game
+        :param max_lasers: most laser beams observed in each game
+        :param dt: length of each tick in seconds
+        :param max_ticks: most ticks an episode can last before it's cut short, or None for no limit
+        :param numpy_physics: if True, the games use the NumPy physics world
+        """
+        self.num_envs = num_envs
+        self.dt = dt
+        self.max_ticks = max_ticks
+        self.games = [Asteroids.Asteroids(numpy_physics=numpy_physics, headless=True) for i in range(num_envs)]
+        self.seeds = [seed + i for i in range(num_envs)]  # Seed of the episode each game is playing
+        self.episode_ticks = np.zeros(num_envs, dtype=np.int64)
+
+        self.observations = {
+            "rocket": np.zeros((num_envs, ROCKET_FEATURES)),
+            "asteroids": np.zeros((num_envs, max_asteroids, ASTEROID_FEATURES)),
+            "asteroid_mask": np.zeros((num_envs, max_asteroids), dtype=bool),
+            "lasers": np.zeros((num_envs, max_lasers, LASER_FEATURES)),
+            "laser_mask": np.zeros((num_envs, max_lasers), dtype=bool),
+        }
+        self.rewards = np.zeros(num_envs)
+        self.dones = np.zeros(num_envs, dtype=bool)
+
+    def reset(self, seed=None):
+        """
+        Method to start a new episode in every game
+
+        :param seed: if given, the games are seeded from this again as in the constructor
+        :return observations:
+        """
+        if seed is not None:
+            self.seeds = [seed + i for i in range(self.num_envs)]
+        for index in range(self.num_envs):
+            self._reset_game(index)
+        self._observe()
+        return self.observations
+
+    def step(self, actions):
+        """
+        Method to advance every game by one tick
+
+        :param actions: sequence of one set of action flags per game
+        :return (observations, rewards, dones, infos): rewards are the points scored in the tick, dones mark the games
+            that ended (and were started again), and each info has the game's lives and score, plus final_score and
+            truncated for a game that ended
+        """
+        infos = []
+        for index, game in enumerate(self.games):
+            score = game.score
+            game.tick(int(actions[index]))
+            self.episode_ticks[index] += 1
+            self.rewards[index] = game.score - score
+
+            info = {"lives": game.lives, "score": game.score}
+            truncated = self.max_ticks is not None and self.episode_ticks[index] >= self.max_ticks
+            done = game.scene == Asteroids.GAME_OVER or truncated
+            self.dones[index] = done
+            if done:
+                info["final_score"] = game.score
+                info["truncated"] = bool(truncated and game.scene != Asteroids.GAME_OVER)
+                self.seeds[index] += self.num_envs
+                self._reset_game(index)
+            infos.append(info)
+
+        self._observe()
+        return self.observations, self.rewards, self.dones, infos
+
+    def render(self, index=0, alpha=1.0):
+        """
+        Method to draw one of the games and return the frame as an array of pixels
+        All of the games share one display surface, so each frame should be copied before another is rendered.
+
+        :param index: which game to draw
+        :param alpha: fraction of the way between the last two ticks to draw the sprites at
+        :return frame: (width, height, 3) array of RGB pixels
+        """
+        game = self.games[index]
+        game.draw(alpha)
+        return pygame_pixels(game.screen)
+
+    def _reset_game(self, index):
+        game = self.games[index]
+        # Reset explicitly, as a truncated episode may have been cut off in any scene, even part way through a respawn
+        game.reset(self.seeds[index])
+        game.dt = self.dt
+        self.episode_ticks[index] = 0
+        if game.scene != Asteroids.PLAYING or game.lives != Asteroids.STARTING_LIVES or game.score != 0:
+            raise AssertionError("game {} was left with {} lives and score {} in the {} scene by its reset".format(
+                index, game.lives, game.score, game.scene))
+
+    def _observe(self):
+        """
+        Method to write the state of every game into the observation arrays
+        """
+        rocket = self.observations["rocket"]
+        asteroids = self.observations["asteroids"]
+        asteroid_mask = self.observations["asteroid_mask"]
+        lasers = self.observations["lasers"]
+        laser_mask = self.observations["laser_mask"]
+        max_asteroids = asteroids.shape[1]
+        max_lasers = lasers.shape[1]
+        asteroid_mask[:] = False
+        laser_mask[:] = False
+
+        for index, game in enumerate(self.games):
+            rocket[index] = sprite_state(game.rocket)
+
+            observed = list(game.asteroids)[:max_asteroids]
+            count = len(observed)
+            if count:
+                fill_states(game, observed, asteroids[index, :count])
+                asteroids[index, :count, 6] = [asteroid.size for asteroid in observed]
+                asteroid_mask[index, :count] = True
+
+            observed = list(game.laser_beams)[:max_lasers]
+            count = len(observed)
+            if count:
+                fill_states(game, observed, lasers[index, :count])
+                laser_mask[index, :count] = True
+
+
+def sprite_state(sprite):
+    """
+    Function to return a sprite's position, velocity, angle and angular velocity as a tuple
+    :param sprite:
+    :return (x, y, vx, vy, angle, angular_velocity):
+    """
+    position = sprite.position
+    velocity = sprite.velocity
+    return position.x, position.y, velocity.x, velocity.y, sprite.angle, sprite.angular_velocity
+
+
+def fill_states(game, sprites, out):
+    """
+    Function to write the state of each sprite into the first six columns of a row of out
+    Sprites in the game's physics world are copied from its arrays in one go.
+
+    :param game:
+    :param sprites:
+    :param out: array with a row for each sprite
+    """
+    physics = game.physics
+    if physics is not None:
+        rows = [sprite.body for sprite in sprites]
+        out[:, 0:2] = physics.position[rows]
+        out[:, 2:4] = physics.velocity[rows]
+        out[:, 4] = physics.angle[rows]
+        out[:, 5] = physics.angular_velocity[rows]
+    else:
+        out[:, :6] = [sprite_state(sprite) for sprite in sprites]
+
+
+def pygame_pixels(surface):
+    """
+    Function to return a copy of a surface's pixels as a (width, height, 3) array
+    :param surface:
+    :return pixels:
+    """
+    import pygame.surfarray  # Only needed when rendering
+    return pygame.surfarray.array3d(surface)
@@ -0,0 +1,114 @@
+"""
+Headless
+Runs the game without a window at a fixed timestep, as fast as possible, to measure simulation throughput.
+
+The game is seeded and stepped with a fixed dt, so the same seed, input source and number of ticks always play out
+the same way. When the player runs out of lives a new game is started and the run carries on.
+Run from the repository root with: python headless.py --ticks 10000
+"""
+import argparse
+import random
+import time
+
+import Asteroids
+
+
+def random_input(seed=0, forward=0.5, turn=0.3, fire=0.1):
+    """
+    Function to make an input source that presses each control at random with the given probabilities
+
+    :param seed: seed for the input's own random number generator
+    :param forward: chance of accelerating on each tick
+    :param turn: chance of turning on each tick, split evenly between left and right
+    :param fire: chance of firing on each tick
+    :return input_source:
+    """
+    rng = random.Random(seed)
+
+    def input_source(game):
+        actions = 0
+        if rng.random() < forward:
+            actions |= Asteroids.FORWARD
+        turning = rng.random()
+        if turning < turn / 2:
+            actions |= Asteroids.TURN_LEFT
+        elif turning < turn:
+            actions |= Asteroids.TURN_RIGHT
+        if rng.random() < fire:
+            actions |= Asteroids.FIRE
+        return actions
+
+    return input_source
+
+
+def scripted_input(script):
+    """
+    Function to make an input source that repeats a list of action flags, one per tick
+
+    :param script: list of bit flags made from Asteroids.FORWARD, TURN_LEFT, TURN_RIGHT and FIRE
+    :return input_source:
+    """
+    tick = 0
+
+    def input_source(game):
+        nonlocal tick
+        actions = script[tick % len(script)]
+        tick += 1
+        return actions
+
+    return input_source
+
+
+def run(ticks, seed=0, dt=1 / 60, input_source=None, numpy_physics=False):
+    """
+    Function to run the game headlessly for a number of ticks and return statistics about the run
+
+    :param ticks: number of ticks to simulate
+    :param seed: seed for the game and, if no input source is given, for the random input
+    :param dt: length of each tick in seconds
+    :param input_source: function taking the game and returning the action flags for the tick
+    :param numpy_physics: if True, use the NumPy physics world
+    :return stats: dictionary of ticks, seconds, ticks_per_second, games and scores (of finished games)
+    """
+    if input_source is None:
+        input_source = random_input(seed)
+
+    game = Asteroids.Asteroids(numpy_physics=numpy_physics, headless=True, seed=seed)
+    game.start_game()
+    game.dt = dt
+    scores = []
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        game.tick(input_source(game))
+        if game.scene == Asteroids.GAME_OVER:
+            scores.append(game.score)
+            game.start_game()
+            game.dt = dt
+    seconds = time.perf_counter() - start
+
+    return {"ticks": ticks, "seconds": seconds, "ticks_per_second": ticks / seconds, "games": len(scores) + 1,
+            "scores": scores, "final_score": game.score}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Asteroids headlessly and report simulation throughput")
+    parser.add_argument("--ticks", type=int, default=10000, help="number of ticks to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the game and the random input")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="length of each tick in seconds")
+    parser.add_argument("--script", help="comma separated action flags to repeat instead of random input, "
+                                         "e.g. 1,3,9 (1 forward, 2 left, 4 right, 8 fire)")
+    parser.add_argument("--numpy-physics", action="store_true", help="use the NumPy physics world")
+    args = parser.parse_args()
+
+    input_source = None
+    if args.script:
+        input_source = scripted_input([int(actions) for actions in args.script.split(",")])
+
+    stats = run(args.ticks, args.seed, args.dt, input_source, args.numpy_physics)
+    print("{ticks} ticks in {seconds:.3f} s: {ticks_per_second:.0f} ticks/s, "
+          "{games} games, final score {final_score}".format(**stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Highscores
+Leaderboard of the best scores, with the player's name and when each was set.
+
+The leaderboard is read once when the game starts and kept in memory. Adding a score changes it straight away, and
+the file is written on a background thread, to a temporary file that's then renamed over the old one, so the game
+never waits for the disk and a crash part way through a write can't leave a broken file behind.
+"""
+import json
+import os
+import threading
+import time
+
+FILE_VERSION = 1
+
+
+class HighScores:
+    """
+    Class to hold the top scores and save them in the background
+    Scores are kept as a list of {"name", "score", "time"} dictionaries, best first.
+    """
+
+    def __init__(self, path, size=10, legacy_path=None):
+        """
+        Constructor method for the leaderboard. Loads it from path.
+
+        :param path: JSON file the leaderboard is saved in
+        :param size: number of scores to keep
+        :param legacy_path: old high score file holding a single number, read if path doesn't exist yet
+        """
+        self.path = path
+        self.size = size
+        self.scores = load(path, legacy_path)[:size]
+
+        self.pending = None  # Leaderboard waiting to be written, if there is one
+        self.condition = threading.Condition()
+        self.writing = False
+        self.closed = False
+        self.writer = threading.Thread(target=self._write_loop, name="highscore-writer", daemon=True)
+        self.writer.start()
+
+    @property
+    def best(self):
+        """
+        The best score on the leaderboard, or 0 if it's empty
+        """
+        return self.scores[0]["score"] if self.scores else 0
+
+    def add(self, name, score):
+        """
+        Method to add a score to the leaderboard if it's good enough, and save the leaderboard in the background.
+        Scores of 0 aren't added. A score equal to one already on the board goes below it.
+
+        :param name: player's name
+        :param score:
+        :return rank: position of the score on the leaderboard, 0 for the best, or None if it didn't make it
+        """
+        if score <= 0:
+            return None
+        rank = 0
+        while rank < len(self.scores) and self.scores[rank]["score"] >= score:
+            rank += 1
+        if rank >= self.size:
+            return None
+
+        self.scores.insert(rank, {"name": name, "score": score, "time": time.time()})
+        del self.scores[self.size:]
+        self.save()
+        return rank
+
+    def save(self):
+        """
+        Method to have the background thread write the leaderboard
+        Only the latest leaderboard is written if several saves are made while a write is in progress.
+        """
+        with self.condition:
+            self.pending = [dict(entry) for entry in self.scores]
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Method to wait until every save made so far has been written
+
+        :param timeout: most seconds to wait, or None to wait as long as it takes
+        :return written: True if there was nothing left to write
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending is None and not self.writing, timeout)
+
+    def close(self, timeout=5):
+        """
+        Method to finish writing and stop the background thread, called when the game closes
+
+        :param timeout: most seconds to wait for the last write
+        """
+        self.flush(timeout)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.writer.join(timeout)
+
+    def _write_loop(self):
+        """
+        Method run by the background thread to write each pending leaderboard
+        """
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or self.closed)
+                if self.pending is None:
+                    return
+                scores = self.pending
+                self.pending = None
+                self.writing = True
+            try:
+                write(self.path, scores)
+            except OSError:
+                pass  # Keep playing if the disk isn't writable, the scores are still kept in memory
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+
+def load(path, legacy_path=None):
+    """
+    Function to read a leaderboard file, returning an empty leaderboard if it's missing, empty or unreadable
+
+    :param path:
+    :param legacy_path: old high score file holding a single number, read if path doesn't exist
+    :return scores:
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return sorted(({"name": str(entry["name"]), "score": int(entry["score"]), "time": float(entry["time"])}
+                       for entry in data["scores"]), key=lambda entry: -entry["score"])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+
+    if legacy_path is None:
+        return []
+    try:
+        with open(legacy_path) as f:
+            score = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return []
+    return [{"name": "", "score": score, "time": 0.0}] if score > 0 else []
+
+
+def write(path, scores):
+    """
+    Function to write a leaderboard file atomically, by writing a temporary file and renaming it over the old one
+
+    :param path:
+    :param scores:
+    """
+    temp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temp_path, "w") as f:
+        json.dump({"version": FILE_VERSION, "scores": scores}, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
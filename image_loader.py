@@ -1,7 +1,14 @@
 """
 Takes in a filepath to a texture image and a dictionary of image names, and corner coordinates.
 Returns a dictionary of pygame surfaces for each sprite.
+
+load_atlas also bakes the textures at each size they're drawn at (and, for chosen textures, every rotation) into a
+single atlas, cached in one binary file with a JSON manifest so later runs load it with a single read.
 """
+import json
+import os
+import struct
+
 import pygame
 
 
@@ -37,3 +44,169 @@ def get_textures(image_path, image_index):
         sprites[sprite] = sprite_image
 
     return sprites
+
+
+ATLAS_MAGIC = b"ATLS"
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct("<4sHI")  # Magic, format version and length of the manifest in bytes
+ATLAS_WIDTH = 2048
+
+
+class Atlas:
+    """
+    Class to hold the textures cut out of an atlas, along with their pre-scaled and pre-rotated variants
+
+    textures maps each texture name to its image at its original size, scaled maps (name, scale) to the texture at
+    that scale, and rotated maps (name, scale, step) to the scaled texture rotated clockwise by step out of steps
+    per revolution. Every image is a subsurface of the one atlas surface.
+    """
+
+    def __init__(self, surface, manifest):
+        """
+        Constructor method for the atlas.
+
+        :param surface: the whole atlas
+        :param manifest: dictionary with the rectangle of each image in the atlas, as written by save_atlas
+        """
+        self.surface = surface
+        self.steps = manifest["steps"]
+        self.textures = {name: surface.subsurface(rect) for name, rect in manifest["textures"].items()}
+        self.scaled = {(name, (width, height)): surface.subsurface(rect)
+                       for name, width, height, rect in manifest["scaled"]}
+        self.rotated = {(name, (width, height), step): surface.subsurface(rect)
+                        for name, width, height, step, rect in manifest["rotated"]}
+
+
+def load_atlas(image_path, image_index, scales, cache_path, rotation_steps=360, rotated=()):
+    """
+    Function to return an atlas of the textures in image_index with a copy of each at every size it's drawn at.
+    The atlas is read from cache_path if it was made from the same texture image and arguments, and otherwise it's
+    built and saved there for next time.
+
+    :param image_path: path to the texture image
+    :param image_index: index of the textures in the image, in the same format as for get_textures
+    :param scales: dictionary of texture name to a list of the (width, height) sizes it's drawn at
+    :param cache_path: path of the cached atlas file
+    :param rotation_steps: number of angles per revolution to pre-rotate textures at
+    :param rotated: names of the textures to store every rotation of at each of their scales
+    :return atlas:
+    """
+    stat = os.stat(image_path)
+    key = repr((image_path, stat.st_size, stat.st_mtime_ns, sorted(image_index.items()),
+                sorted((name, sorted(tuple(scale) for scale in sizes)) for name, sizes in scales.items()),
+                rotation_steps, sorted(rotated)))
+
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        manifest, surface = read_atlas(data)
+        if manifest["key"] == key:
+            return Atlas(surface, manifest)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass  # No usable cache (missing, corrupt or with a manifest from another version), so build the atlas
+
+    manifest, surface = build_atlas(image_path, image_index, scales, rotation_steps, rotated)
+    manifest["key"] = key
+    try:
+        save_atlas(cache_path, manifest, surface)
+    except OSError:
+        pass  # The atlas still works if it can't be cached, it just gets built again next time
+    return Atlas(surface, manifest)
+
+
+def build_atlas(image_path, image_index, scales, rotation_steps=360, rotated=()):
+    """
+    Function to scale (and rotate) each texture and pack the results into one surface
+
+    Images are packed into rows from tallest to shortest, each row as tall as the first image in it.
+    :param image_path:
+    :param image_index:
+    :param scales:
+    :param rotation_steps:
+    :param rotated:
+    :return (manifest, surface):
+    """
+    textures = get_textures(image_path, image_index)
+
+    # Make every image that goes in the atlas, with the manifest entry each one's rectangle is filled in for
+    images = []
+    manifest = {"steps": rotation_steps, "textures": {}, "scaled": [], "rotated": []}
+    for name, texture in textures.items():
+        images.append((texture, ("textures", name)))
+        for scale in scales.get(name, ()):
+            scaled_image = pygame.transform.scale(texture, scale)
+            images.append((scaled_image, ("scaled", [name, scale[0], scale[1]])))
+            if name in rotated:
+                for step in range(rotation_steps):
+                    rotated_image = pygame.transform.rotate(scaled_image, step * (-360 / rotation_steps))
+                    images.append((rotated_image, ("rotated", [name, scale[0], scale[1], step])))
+
+    # Pack the images into rows
+    images.sort(key=lambda item: -item[0].get_height())
+    rects = []
+    x = y = row_height = 0
+    for image, entry in images:
+        width, height = image.get_size()
+        if x + width > ATLAS_WIDTH:
+            x = 0
+            y += row_height
+            row_height = 0
+        rects.append((x, y, width, height))
+        x += width
+        row_height = max(row_height, height)
+
+    surface = pygame.Surface((ATLAS_WIDTH, max(y + row_height, 1)), flags=pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    for (image, (section, entry)), rect in zip(images, rects):
+        surface.blit(image, rect[:2])
+        if section == "textures":
+            manifest["textures"][entry] = rect
+        else:
+            manifest[section].append(entry + [rect])
+    return manifest, surface.convert_alpha()
+
+
+def save_atlas(cache_path, manifest, surface):
+    """
+    Function to write an atlas to a file: a header, the manifest as JSON and then the atlas' RGBA pixels.
+    Writes to a temporary file which is then renamed, so a half written atlas is never read.
+
+    :param cache_path:
+    :param manifest:
+    :param surface:
+    """
+    manifest = dict(manifest, size=surface.get_size())
+    manifest_data = json.dumps(manifest).encode()
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = "{}.{}.tmp".format(cache_path, os.getpid())
+    with open(temp_path, "wb") as f:
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, len(manifest_data)))
+        f.write(manifest_data)
+        f.write(pygame.image.tobytes(surface, "RGBA"))
+    os.replace(temp_path, cache_path)
+
+
+def read_atlas(data):
+    """
+    Function to read an atlas from the contents of an atlas file
+    Raises ValueError if the data isn't an atlas of the current version.
+
+    :param data: bytes of the whole file
+    :return (manifest, surface):
+    """
+    if len(data) < ATLAS_HEADER.size:
+        raise ValueError("atlas file is truncated")
+    magic, version, manifest_length = ATLAS_HEADER.unpack_from(data)
+    if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+        raise ValueError("not an atlas file of version {}".format(ATLAS_VERSION))
+
+    start = ATLAS_HEADER.size
+    manifest = json.loads(data[start:start + manifest_length])
+    size = tuple(manifest["size"])
+    pixels = data[start + manifest_length:]
+    if len(pixels) != size[0] * size[1] * 4:
+        raise ValueError("atlas file is truncated")
+    surface = pygame.image.frombytes(pixels, size, "RGBA").convert_alpha()
+    return manifest, surface
@@ -0,0 +1,222 @@
+"""
+Particles
+NumPy particle system for the explosions and the rocket's exhaust.
+
+Every particle's position, velocity, time left, lifetime and colour are stored in NumPy arrays made once at full
+capacity, one row per particle, and all of them are moved and aged together in one vectorised step each tick. Rows
+0 to count-1 are alive. The particles still alive after a step are packed down over the rows of the ones that died,
+through scratch arrays that are made up front too, so the rows are reused by the next particles emitted and updating
+the particles doesn't allocate any arrays. The particles are drawn as small
+squares written straight into the screen's pixels in one batch (see render.ScreenRenderer.plot), instead of as a
+sprite each.
+
+Particles are only for show, so they're moved in real seconds and pixels rather than the sprites' simulation time,
+and have their own random number generator. They never touch the game's generator or state, so games, recordings
+and snapshots play out the same with or without them.
+"""
+import math
+
+import numpy as np
+
+import render
+
+PARTICLE_SIZE = 2  # Width and height of each particle in pixels
+DRAG = 1.5  # Fraction of a particle's speed lost per second, as a rate of exponential decay
+
+# Colours each effect's particles start at, chosen from at random, fading to black as they die
+EXPLOSION_COLOURS = ((255, 245, 220), (255, 190, 90), (235, 120, 40), (160, 150, 140))
+EXHAUST_COLOURS = ((255, 240, 150), (255, 170, 50), (240, 100, 30))
+# Range of speeds in pixels per second and lifetimes in seconds of each effect's particles
+EXPLOSION_SPEEDS = (30, 240)
+EXPLOSION_LIFETIMES = (0.4, 1.2)
+EXHAUST_SPEEDS = (120, 260)
+EXHAUST_LIFETIMES = (0.15, 0.4)
+EXHAUST_SPREAD = 0.3  # Most angle in radians either side of straight back the exhaust is thrown out at
+
+
+class ParticleSystem:
+    """
+    Class to hold every particle in the game and move, age and draw them together
+    When the arrays are full, new particles are dropped until old ones die.
+    """
+
+    def __init__(self, screen, capacity=10000, seed=None):
+        """
+        Constructor method for the particle system.
+
+        :param screen: the display surface, whose size the particles wrap around and whose pixel format they're
+            drawn in
+        :param capacity: most particles alive at once
+        :param seed: seed for the particles' random number generator, any integer or None
+        """
+        self.screen_dims = screen.get_size()
+        self.capacity = capacity
+        self.count = 0
+        # NumPy only takes seeds of 0 and up, so negative seeds are made positive, as random.Random does
+        self.rng = np.random.default_rng(None if seed is None else abs(seed))
+        self.last_dt = 0  # Length of the last step, for drawing the particles part of the way through it
+
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.time_left = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity)
+        self.colour = np.zeros((capacity, 3))
+        # Scratch space for each step, so updating never allocates: which particles are alive and dead, how far they
+        #   move, where each living particle is packed to, the rows to pack, and each array paired with a scratch
+        #   array of the same shape to gather its living rows into
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.dead = np.zeros(capacity, dtype=bool)
+        self.step_movement = np.zeros((capacity, 2))
+        self.ranks = np.zeros(capacity, dtype=np.intp)
+        self.rows = np.arange(capacity, dtype=np.intp)
+        self.pack_order = np.zeros(capacity + 1, dtype=np.intp)
+        scalars, vectors, colours = np.zeros(capacity), np.zeros((capacity, 2)), np.zeros((capacity, 3))
+        self.packing = ((self.position, vectors), (self.velocity, vectors), (self.time_left, scalars),
+                        (self.lifetime, scalars), (self.colour, colours))
+
+        # How to pack a colour into one of the screen's pixels, as pygame.Surface.map_rgb does
+        self.colour_losses = np.array(screen.get_losses()[:3], dtype=np.uint32)
+        self.colour_shifts = np.array(screen.get_shifts()[:3], dtype=np.uint32)
+        self.opaque = np.uint32(screen.get_masks()[3])  # Alpha bits set in every pixel, if the screen has any
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """
+        Method to remove every particle
+        """
+        self.count = 0
+
+    def emit(self, count, position, velocity, speeds, lifetimes, colours, direction=0.0, spread=math.pi, radius=0.0):
+        """
+        Method to add a burst of particles, thrown out from around a point at random speeds and angles
+
+        :param count: number of particles, fewer being added if there isn't room for them all
+        :param position: (x, y) the particles are thrown out from
+        :param velocity: (vx, vy) in pixels per second added to every particle's velocity
+        :param speeds: (slowest, fastest) speed in pixels per second the particles are thrown out at
+        :param lifetimes: (shortest, longest) seconds the particles live for
+        :param colours: sequence of (r, g, b) colours to choose each particle's colour from
+        :param direction: angle in radians clockwise from up the particles are thrown out around
+        :param spread: most angle in radians either side of direction, pi to throw them out in every direction
+        :param radius: the particles start a random distance up to this far from position, along their direction
+        :return added: number of particles added
+        """
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return 0
+        rows = slice(self.count, self.count + count)
+        rng = self.rng
+
+        angle = direction + rng.uniform(-spread, spread, count)
+        # The same unit vector as Sprite.direction, so angles match the sprites'
+        unit = np.column_stack((np.sin(angle), -np.cos(angle)))
+        self.position[rows] = position + unit * rng.uniform(0, radius, (count, 1))
+        self.velocity[rows] = velocity + unit * rng.uniform(speeds[0], speeds[1], (count, 1))
+        self.time_left[rows] = self.lifetime[rows] = rng.uniform(lifetimes[0], lifetimes[1], count)
+        self.colour[rows] = np.asarray(colours, dtype=float)[rng.integers(0, len(colours), count)]
+
+        self.count += count
+        return count
+
+    def explosion(self, position, velocity, radius, count):
+        """
+        Method to throw out a burst of debris in every direction, as when an asteroid is destroyed
+
+        :param position:
+        :param velocity: velocity of what exploded in pixels per second, which the debris carries on with
+        :param radius: size of what exploded
+        :param count:
+        :return added:
+        """
+        return self.emit(count, position, velocity, EXPLOSION_SPEEDS, EXPLOSION_LIFETIMES, EXPLOSION_COLOURS,
+                         radius=radius)
+
+    def exhaust(self, position, velocity, angle, count):
+        """
+        Method to throw out exhaust behind a rocket
+
+        :param position: (x, y) of the end of the rocket's nozzle
+        :param velocity: rocket's velocity in pixels per second
+        :param angle: angle in radians clockwise the rocket is facing
+        :param count:
+        :return added:
+        """
+        return self.emit(count, position, velocity, EXHAUST_SPEEDS, EXHAUST_LIFETIMES, EXHAUST_COLOURS,
+                         direction=angle + math.pi, spread=EXHAUST_SPREAD)
+
+    def update(self, dt):
+        """
+        Method to move and age every particle by dt seconds, removing the ones that die.
+        The particles slow down with drag and wrap around the edges of the screen.
+
+        :param dt:
+        """
+        n = self.count
+        if n == 0:
+            return
+        self.last_dt = dt
+
+        self.time_left[:n] -= dt
+        alive = np.greater(self.time_left[:n], 0, out=self.alive[:n])
+        count = int(np.count_nonzero(alive))
+        if count < n:
+            self._pack(count)
+            n = count
+
+        velocity = self.velocity[:n]
+        velocity *= math.exp(-DRAG * dt)
+        movement = np.multiply(velocity, dt, out=self.step_movement[:n])
+        position = self.position[:n]
+        position += movement
+        for axis in range(2):
+            coords = position[:, axis]
+            np.mod(coords, self.screen_dims[axis], out=coords)  # One axis at a time, which needs no buffer
+
+    def draw(self, renderer, alpha=1.0):
+        """
+        Method to queue every particle to be drawn, each faded towards black as it gets closer to dying
+
+        :param renderer:
+        :param alpha: fraction of the way through the last step to draw the particles at
+        """
+        n = self.count
+        if n == 0:
+            return
+
+        position = self.position[:n]
+        if alpha < 1:
+            position = position - self.velocity[:n] * ((1 - alpha) * self.last_dt)
+            np.mod(position, self.screen_dims, out=position)
+        # Positions are wrapped onto the screen, so only the right and bottom edges can cut a particle off
+        xs = np.minimum(position[:, 0].astype(np.intp), self.screen_dims[0] - PARTICLE_SIZE)
+        ys = np.minimum(position[:, 1].astype(np.intp), self.screen_dims[1] - PARTICLE_SIZE)
+
+        fade = self.time_left[:n] / self.lifetime[:n]
+        colours = (self.colour[:n] * fade[:, np.newaxis]).astype(np.uint32)
+        pixels = np.bitwise_or.reduce((colours >> self.colour_losses) << self.colour_shifts, axis=1) | self.opaque
+        renderer.plot(xs, ys, pixels, render.PARTICLE_LAYER, PARTICLE_SIZE)
+
+    def _pack(self, count):
+        """
+        Method to move the living particles down over the rows of the ones that died, keeping them in order
+        Works out which row each living particle goes to, then gathers each array's living rows into its scratch
+        array and copies them back, all in arrays made up front.
+
+        :param count: number of the first count particles still alive, as marked in alive
+        """
+        n = self.count
+        alive = self.alive[:n]
+        ranks = self.ranks[:n]
+        dead = np.logical_not(alive, out=self.dead[:n])
+        np.copyto(ranks, alive)
+        np.cumsum(ranks, out=ranks)  # Each living particle's position among the living, counting from 1
+        np.copyto(ranks, 0, where=dead)  # The dead are all sent to position 0, which isn't packed
+        np.put(self.pack_order, ranks, self.rows[:n], mode="clip")
+        order = self.pack_order[1:count + 1]  # Rows of the living particles, in order
+
+        for array, scratch in self.packing:
+            packed = np.take(array[:n], order, axis=0, out=scratch[:count], mode="clip")
+            array[:count] = packed
+        self.count = count
@@ -0,0 +1,156 @@
+"""
+Physics
+Structure-of-arrays physics world for the game's sprites.
+
+Stores the position, velocity, acceleration, angle and angular velocity of every sprite in the world in contiguous
+NumPy arrays, one row per sprite, and integrates and wraps them all around the screen in a single vectorised step.
+The position and angle from before the last step are kept too, so the sprites can be drawn between steps.
+"""
+import numpy as np
+
+import vector as v
+
+
+class PhysicsWorld:
+    """
+    Class to hold the state of all of the sprites in the world and integrate them together
+    Rows 0 to count-1 are in use. Removing a sprite moves the last row into its place so the rows stay packed.
+    """
+
+    def __init__(self, screen_dims, capacity=256):
+        """
+        Constructor method for the physics world.
+
+        :param screen_dims: (width, height) of the screen, used to wrap sprites around the edges
+        :param capacity: number of rows to allocate up front; the arrays grow when they fill up
+        """
+        self.screen_dims = screen_dims
+        self.count = 0
+        self.sprites = []  # The sprite stored in each row
+
+        self.position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.acceleration = np.zeros((capacity, 2))
+        self.angle = np.zeros(capacity)
+        self.angular_velocity = np.zeros(capacity)
+        self.previous_position = np.zeros((capacity, 2))  # Position and angle before the last step
+        self.previous_angle = np.zeros(capacity)
+
+    def add(self, sprite, position, velocity, angle, angular_velocity):
+        """
+        Method to add a sprite to the world and return the row its state is stored in
+
+        :param sprite:
+        :param position:
+        :param velocity:
+        :param angle:
+        :param angular_velocity:
+        :return row:
+        """
+        if self.count == len(self.angle):
+            self._grow()
+
+        row = self.count
+        self.position[row] = position
+        self.velocity[row] = velocity
+        self.acceleration[row] = 0
+        self.angle[row] = angle
+        self.angular_velocity[row] = angular_velocity
+        self.previous_position[row] = position
+        self.previous_angle[row] = angle
+
+        self.sprites.append(sprite)
+        self.count += 1
+        return row
+
+    def remove(self, sprite):
+        """
+        Method to remove a sprite from the world by moving the last row into its place
+
+        :param sprite:
+        """
+        row = sprite.body
+        last = self.count - 1
+        if row != last:
+            moved = self.sprites[last]
+            for array in (self.position, self.velocity, self.acceleration, self.angle, self.angular_velocity,
+                          self.previous_position, self.previous_angle):
+                array[row] = array[last]
+            self.sprites[row] = moved
+            moved.body = row
+
+        self.sprites.pop()
+        self.count -= 1
+        sprite.body = None
+
+    def clear(self):
+        """
+        Method to remove every sprite from the world
+        """
+        for sprite in self.sprites:
+            sprite.body = None
+        self.sprites = []
+        self.count = 0
+
+    def step(self, dt):
+        """
+        Method to integrate every sprite in the world by dt and wrap them around the edges of the screen.
+        Uses the same Euler integration and edge wrapping as Sprite.update and Sprite.check_edges.
+
+        :param dt: simulation timestep
+        """
+        n = self.count
+        self.previous_position[:n] = self.position[:n]
+        self.previous_angle[:n] = self.angle[:n]
+
+        position = self.position[:n]
+        position += self.velocity[:n] * dt
+        self.velocity[:n] += self.acceleration[:n] * dt
+        self.angle[:n] += self.angular_velocity[:n] * dt
+
+        for axis in range(2):
+            coords = position[:, axis]
+            coords[coords < 0] = self.screen_dims[axis]
+            coords[coords > self.screen_dims[axis]] = 0
+
+    def snap(self, row):
+        """
+        Method to set a row's previous position and angle to its current ones, after it's been moved without being
+        integrated, so it isn't drawn moving across the screen to its new position
+
+        :param row:
+        """
+        self.previous_position[row] = self.position[row]
+        self.previous_angle[row] = self.angle[row]
+
+    def previous(self, row):
+        """
+        Method to return a row's position and angle from before the last step
+        :param row:
+        :return (x, y, angle):
+        """
+        x, y = self.previous_position[row].tolist()
+        return x, y, float(self.previous_angle[row])
+
+    def _grow(self):
+        """
+        Method to double the capacity of the arrays
+        """
+        capacity = 2 * len(self.angle)
+        for name in ("position", "velocity", "acceleration", "angle", "angular_velocity", "previous_position",
+                     "previous_angle"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:])
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    @staticmethod
+    def get_vector(array, row):
+        """
+        Function to return a row of one of the world's 2D arrays as a vector
+        :param array:
+        :param row:
+        :return vector:
+        """
+        x, y = array[row].tolist()
+        return v.vector2(x, y)
@@ -0,0 +1,65 @@
+"""
+Pool
+Object pool for sprites that are made and destroyed often, such as lasers and asteroids.
+"""
+
+
+class ObjectPool:
+    """
+    Class to keep released objects so they can be reused instead of constructing new ones
+
+    The pooled class is constructed as cls(game, *args), and must have a spawn(*args) method taking the same
+    arguments to set a released object up again.
+    """
+
+    def __init__(self, game, cls):
+        """
+        Constructor method for the pool.
+
+        :param game:
+        :param cls: the class of object to pool
+        """
+        self.game = game
+        self.cls = cls
+        self.free = []  # Released objects waiting to be reused
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, *args):
+        """
+        Method to return an object set up with args, reusing a released one if there is one
+
+        :param args:
+        :return obj:
+        """
+        if self.free:
+            obj = self.free.pop()
+            obj.spawn(*args)
+            return obj
+        return self.cls(self.game, *args)
+
+    def take(self):
+        """
+        Method to return a released object without setting it up again, or None if there aren't any
+        For callers that set up the object's whole state themselves.
+
+        :return obj:
+        """
+        return self.free.pop() if self.free else None
+
+    def release(self, obj):
+        """
+        Method to hand an object back to the pool once the game has finished with it
+
+        :param obj:
+        """
+        self.free.append(obj)
+
+    def release_all(self, objects):
+        """
+        Method to hand a list of objects back to the pool
+
+        :param objects:
+        """
+        self.free.extend(objects)
@@ -0,0 +1,280 @@
+"""
+Profiler
+Per-frame timing of each phase of the game loop.
+
+Keeps rolling percentiles of the frame time, can draw them over the game, and can record a trace of the most recent
+frames to save as CSV or as Chrome trace JSON (open it in chrome://tracing or Perfetto). StartupTimer times the steps of
+starting the game, up to the first frame.
+"""
+import csv
+import json
+import time
+from collections import deque
+
+TRACE_FRAMES = 3600  # Most recent frames kept in a trace, a minute at 60 frames per second
+
+
+class Phase:
+    """
+    Context manager to time one phase of a frame
+    """
+
+    def __init__(self, profiler, name, traced=True):
+        self.profiler = profiler
+        self.name = name
+        self.traced = traced
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.traced:
+            self.profiler.add(self.name, self.start, time.perf_counter() - self.start)
+        else:
+            self.profiler.add_total(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class NullPhase:
+    """
+    Context manager used in place of Phase when the profiler is off
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class FrameProfiler:
+    """
+    Class to time the phases of each frame
+
+    Frame times are always kept for the percentiles. Phases are only timed while the overlay is showing or a trace
+    is being recorded, so the game doesn't pay for timing it isn't using. The overlay and CSV show the total time of
+    each phase in a frame, and the Chrome trace shows every time a phase was timed, where it happened, except for
+    phases timed in many small pieces, such as each entity's update, which are only added to the totals.
+    Only the last trace_frames frames are kept in the trace, so recording one for a long session stays bounded.
+    """
+
+    def __init__(self, history=600, trace_frames=TRACE_FRAMES):
+        """
+        Constructor method for the profiler.
+
+        :param history: number of recent frames the percentiles are calculated over
+        :param trace_frames: number of recent frames kept in the trace
+        """
+        self.frame_times = deque(maxlen=history)  # Time taken by each recent frame in seconds
+        self.show_overlay = False
+        self.recording = False
+        self.trace_frames = trace_frames
+        # Recorded frames, as (frame number, frame start, frame time, {phase: total time},
+        #   [(phase, start, time) of each interval])
+        self.trace = deque(maxlen=trace_frames)
+        self.frame_count = 0  # Number of frames finished
+        self.phases = {}  # Total time spent in each phase of the current frame
+        self.intervals = []  # Each time a phase was timed in the current frame, only kept while recording
+        self.frame_start = 0
+        self.last_phases = {}  # Phase times of the last frame, shown on the overlay
+
+    @property
+    def enabled(self):
+        return self.show_overlay or self.recording
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    def start_recording(self):
+        """
+        Method to start recording a trace of each frame, keeping the last trace_frames of them
+        """
+        self.recording = True
+        self.trace = deque(maxlen=self.trace_frames)
+
+    def begin_frame(self):
+        self.phases = {}
+        self.intervals = []
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """
+        Method to finish timing the frame, adding it to the frame times and the trace if one is being recorded
+        """
+        frame_time = time.perf_counter() - self.frame_start
+        self.frame_times.append(frame_time)
+        self.last_phases = self.phases
+        if self.recording:
+            self.trace.append((self.frame_count, self.frame_start, frame_time, self.phases, self.intervals))
+        self.frame_count += 1
+
+    def phase(self, name, traced=True):
+        """
+        Method to return a context manager timing a phase of the frame
+        Timing the same phase more than once in a frame adds the times together.
+
+        :param name:
+        :param traced: if False, the time is only added to the phase's total (see add_total)
+        :return phase:
+        """
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name, traced)
+
+    def add(self, name, start, duration):
+        """
+        Method to add an interval spent in a phase of the current frame to the phase's total, and to the trace if one
+        is being recorded
+
+        :param name:
+        :param start: perf_counter time the interval started
+        :param duration: length of the interval in seconds
+        """
+        self.phases[name] = self.phases.get(name, 0) + duration
+        if self.recording:
+            self.intervals.append((name, start, duration))
+
+    def add_total(self, name, duration):
+        """
+        Method to add time to the total of a phase of the current frame without adding an interval to the trace,
+        for phases timed in many small pieces a frame, which would make the trace grow with the number of entities
+
+        :param name:
+        :param duration: time spent in the phase in seconds
+        """
+        self.phases[name] = self.phases.get(name, 0) + duration
+
+    def percentiles(self, percents=(50, 95, 99)):
+        """
+        Method to return the frame time in ms at each of the given percentiles of the recent frames
+
+        :param percents:
+        :return frame_times:
+        """
+        if not self.frame_times:
+            return [0 for percent in percents]
+        ordered = sorted(self.frame_times)
+        last = len(ordered) - 1
+        return [ordered[round(last * percent / 100)] * 1000 for percent in percents]
+
+    def overlay_lines(self):
+        """
+        Method to return the lines of text shown on the overlay
+        :return lines:
+        """
+        p50, p95, p99 = self.percentiles()
+        lines = ["frame p50 {:.1f}  p95 {:.1f}  p99 {:.1f} ms".format(p50, p95, p99)]
+        for name, duration in sorted(self.last_phases.items(), key=lambda item: -item[1]):
+            lines.append("{} {:.2f} ms".format(name, duration * 1000))
+        return lines
+
+    def draw_overlay(self, game, font, pos=(20, 60)):
+        """
+        Method to draw the overlay, if it's showing, using the game's renderer and text cache
+
+        :param game:
+        :param font:
+        :param pos: top left corner of the overlay
+        """
+        if not self.show_overlay:
+            return
+        x, y = pos
+        for line in self.overlay_lines():
+            text_img = game.text_cache.render(font, line, (255, 255, 0))
+            game.renderer.blit(text_img, (x, y))
+            y += text_img.get_height()
+
+    def save(self, path):
+        """
+        Method to save the recorded trace, as Chrome trace JSON if the path ends in .json and as CSV otherwise
+
+        :param path:
+        """
+        if path.endswith(".json"):
+            self.save_chrome_trace(path)
+        else:
+            self.save_csv(path)
+
+    def save_csv(self, path):
+        """
+        Method to save the recorded trace as CSV, with one row per frame and one column per phase (in ms)
+
+        :param path:
+        """
+        names = sorted({name for frame in self.trace for name in frame[3]})
+        origin = self.trace[0][1] if self.trace else 0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "start_ms", "frame_ms"] + names)
+            for index, start, frame_time, phases, intervals in self.trace:
+                row = [index, round((start - origin) * 1000, 3), round(frame_time * 1000, 3)]
+                row += [round(phases[name] * 1000, 3) if name in phases else "" for name in names]
+                writer.writerow(row)
+
+    def save_chrome_trace(self, path):
+        """
+        Method to save the recorded trace in the Chrome trace event format
+        Each interval timed is its own event, so phases timed more than once in a frame, or inside other phases,
+        show up where each interval happened. Phases only added to the totals are passed as the frame event's args.
+
+        :param path:
+        """
+        origin = self.trace[0][1] if self.trace else 0
+        events = []
+        for index, start, frame_time, phases, intervals in self.trace:
+            traced = {name for name, phase_start, duration in intervals}
+            args = {"frame": index}
+            args.update((name + " ms", round(duration * 1000, 3)) for name, duration in phases.items()
+                        if name not in traced)
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1, "ts": (start - origin) * 1e6,
+                           "dur": frame_time * 1e6, "args": args})
+            for name, phase_start, duration in intervals:
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1, "ts": (phase_start - origin) * 1e6,
+                               "dur": duration * 1e6})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class StartupTimer:
+    """
+    Class to time each step of starting the game, up to its first frame
+    """
+
+    def __init__(self):
+        """
+        Constructor method for the startup timer. Starts timing straight away.
+        """
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.steps = []  # List of (name, seconds) for each step, in order
+
+    @property
+    def total(self):
+        """
+        Seconds from the timer starting to the end of the last step
+        """
+        return self.last - self.start
+
+    def mark(self, name):
+        """
+        Method to end a step, timing it from the end of the step before
+
+        :param name:
+        """
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last))
+        self.last = now
+
+    def report_lines(self):
+        """
+        Method to return the time taken by each step and the total as lines of text
+        :return lines:
+        """
+        lines = ["{:<16}{:>9.1f} ms".format(name, seconds * 1000) for name, seconds in self.steps]
+        lines.append("{:<16}{:>9.1f} ms".format("total", self.total * 1000))
+        return lines
@@ -0,0 +1,155 @@
+"""
+Recording
+Records the seed, the settings that change the simulation and the player's input on every tick of a game, so the
+session can be replayed exactly.
+
+A recording file is a fixed size header followed by the action flags of every tick, one byte each, compressed with
+zlib. Held keys give long runs of the same byte, so a recording is usually a few bytes per second of play.
+
+After the actions come snapshots of the whole game, taken every SNAPSHOT_EVERY ticks while recording, each stored
+as the tick it was taken after and its size, followed by the snapshot in the format written by
+snapshot.Snapshot.to_bytes. A replay can seek to any tick by restoring the nearest snapshot before it, instead of
+simulating the game from the start.
+"""
+import struct
+import zlib
+
+RECORDING_MAGIC = b"AREC"
+RECORDING_VERSION = 3
+# Magic, format version, seed, tick length in seconds, number of ticks, final score, final simulation time, fewest
+# and most asteroids in a wave, asteroids in the first wave, whether the NumPy physics world was used, size of the
+# compressed actions in bytes and number of snapshots
+RECORDING_HEADER = struct.Struct("<4sHQdIqdIIIBII")
+SNAPSHOT_ENTRY = struct.Struct("<II")  # Tick the snapshot was taken after and its size in bytes
+SNAPSHOT_EVERY = 3600  # Ticks between snapshots, a minute of play at 60 ticks per second
+MAX_SEED = 2 ** 64 - 1  # Largest seed the header can store, seeds being unsigned
+
+
+class Recording:
+    """
+    Class to hold a recorded session: the game's seed and settings, the length of each tick, the action flags of each
+    tick and snapshots of the game taken along the way
+    """
+
+    def __init__(self, seed, dt, actions=None, final_score=0, final_time=0.0, snapshots=None, wave_size=(1, 4),
+                 first_wave=3, numpy_physics=False):
+        """
+        Constructor method for the recording.
+
+        :param seed: seed of the game's random number generator
+        :param dt: length of each tick in seconds
+        :param actions: bytearray of the action flags of each tick
+        :param final_score: score when the recording ended, to check a replay against
+        :param final_time: simulation time in ms when the recording ended, to check a replay against
+        :param snapshots: dictionary of the tick each snapshot was taken after to the snapshot, in the snapshot format
+        :param wave_size: (fewest, most) asteroids in each wave the game spawned
+        :param first_wave: number of asteroids at the start of each game
+        :param numpy_physics: whether the game used the NumPy physics world
+        """
+        # Checked here, so a game that can't be recorded fails when its recorder is made rather than losing the
+        #   recording when it's saved
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError("can't record a game with seed {}, the seed must be from 0 to {}".format(seed, MAX_SEED))
+        self.seed = seed
+        self.dt = dt
+        self.actions = bytearray() if actions is None else actions
+        self.final_score = final_score
+        self.final_time = final_time
+        self.snapshots = {} if snapshots is None else snapshots
+        self.wave_size = (wave_size[0], wave_size[1])
+        self.first_wave = first_wave
+        self.numpy_physics = numpy_physics
+
+    def __len__(self):
+        return len(self.actions)
+
+    def save(self, path):
+        """
+        Method to write the recording to a file
+        :param path:
+        """
+        actions = zlib.compress(bytes(self.actions))
+        with open(path, "wb") as f:
+            f.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, self.seed, self.dt, len(self.actions),
+                                          self.final_score, self.final_time, self.wave_size[0], self.wave_size[1],
+                                          self.first_wave, self.numpy_physics, len(actions), len(self.snapshots)))
+            f.write(actions)
+            for tick, data in sorted(self.snapshots.items()):
+                f.write(SNAPSHOT_ENTRY.pack(tick, len(data)))
+                f.write(data)
+
+
+class InputRecorder:
+    """
+    Class to record the actions taken on each tick of a running game, and a snapshot of it every few thousand ticks
+    """
+
+    def __init__(self, game, snapshot_every=SNAPSHOT_EVERY):
+        """
+        Constructor method for the recorder.
+
+        :param game: the game being recorded, which must be seeded and ticked at a fixed dt
+        :param snapshot_every: number of ticks between snapshots, or 0 for none
+        """
+        import snapshot  # Imported here, as snapshot imports Asteroids, which imports this module
+        self.capture = snapshot.capture
+        self.game = game
+        self.snapshot_every = snapshot_every
+        self.recording = Recording(game.seed, game.step_dt, wave_size=game.spawner.wave_size,
+                                   first_wave=game.spawner.first_wave, numpy_physics=game.physics is not None)
+
+    def record(self, actions):
+        """
+        Method to add the actions taken on a tick to the recording, before the tick is played
+        Every snapshot_every ticks, the game is captured first, as it was after the ticks recorded so far.
+
+        :param actions: bit flags of the actions taken
+        """
+        ticks = len(self.recording.actions)
+        if self.snapshot_every and ticks and ticks % self.snapshot_every == 0:
+            self.recording.snapshots[ticks] = self.capture(self.game).to_bytes()
+        self.recording.actions.append(actions)
+
+    def save(self, path):
+        """
+        Method to save the recording, along with the game's current score and time to check a replay against
+        :param path:
+        """
+        self.recording.final_score = self.game.score
+        self.recording.final_time = self.game.time
+        self.recording.save(path)
+
+
+def load(path):
+    """
+    Function to read a recording from a file, with one read
+    Raises ValueError if the file isn't a recording of the current version.
+
+    :param path:
+    :return recording:
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < RECORDING_HEADER.size:
+        raise ValueError("recording file is truncated")
+    (magic, version, seed, dt, ticks, final_score, final_time, smallest_wave, largest_wave, first_wave, numpy_physics,
+     actions_size, snapshot_count) = RECORDING_HEADER.unpack_from(data)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        raise ValueError("not a recording file of version {}".format(RECORDING_VERSION))
+    offset = RECORDING_HEADER.size + actions_size
+    actions = bytearray(zlib.decompress(data[RECORDING_HEADER.size:offset]))
+    if len(actions) != ticks:
+        raise ValueError("recording file is truncated")
+
+    snapshots = {}
+    for index in range(snapshot_count):
+        if len(data) < offset + SNAPSHOT_ENTRY.size:
+            raise ValueError("recording file is truncated")
+        tick, size = SNAPSHOT_ENTRY.unpack_from(data, offset)
+        offset += SNAPSHOT_ENTRY.size
+        snapshots[tick] = data[offset:offset + size]
+        offset += size
+    if offset != len(data):
+        raise ValueError("recording file is truncated")
+    return Recording(seed, dt, actions, final_score, final_time, snapshots, (smallest_wave, largest_wave), first_wave,
+                     bool(numpy_physics))
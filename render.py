@@ -0,0 +1,392 @@
+"""
+Render
+Caches and helpers used to draw the game.
+"""
+import math
+import time
+from collections import OrderedDict
+
+import pygame
+
+# Layers the renderer draws in, from first (bottom) to last (top)
+BACKGROUND_LAYER = 0
+ASTEROID_LAYER = 1
+PARTICLE_LAYER = 2
+LASER_LAYER = 3
+ROCKET_LAYER = 4
+HUD_LAYER = 5
+LAYERS = 6
+
+
+class RotationCache:
+    """
+    Class to cache scaled and rotated copies of the sprite textures
+
+    Scaled textures are shared between every sprite using the same texture at the same size. Rotated copies of them
+    are cached with the angle rounded to one of a fixed number of steps per revolution, so drawing a sprite is a
+    dictionary lookup instead of a call to pygame.transform.rotate. The least recently used rotations are dropped
+    once the cache holds more than max_bytes of pixel data.
+    """
+
+    def __init__(self, steps=360, max_bytes=32 * 1024 * 1024):
+        """
+        Constructor method for the rotation cache.
+
+        :param steps: number of angles per full revolution
+        :param max_bytes: maximum size of the cached rotated images in bytes
+        """
+        self.steps = steps
+        self.max_bytes = max_bytes
+        self.size = 0  # Bytes of pixel data currently cached
+        self.scaled = {}  # Maps (texture, scale) to the shared scaled texture
+        self.rotated = OrderedDict()  # Maps (scaled texture, step) to the rotated image, least recently used first
+
+    def __len__(self):
+        return len(self.rotated)
+
+    def get_scaled(self, image, scale):
+        """
+        Method to return the shared copy of image scaled to scale
+
+        :param image:
+        :param scale:
+        :return scaled_image:
+        """
+        key = (image, (scale[0], scale[1]))
+        scaled_image = self.scaled.get(key)
+        if scaled_image is None:
+            scaled_image = self.scaled[key] = pygame.transform.scale(image, scale)
+        return scaled_image
+
+    def get(self, image, angle):
+        """
+        Method to return image rotated by angle, rounded to the nearest step
+
+        :param image: a scaled texture, as returned by get_scaled
+        :param angle: angle in radians clockwise
+        :return rotated_image:
+        """
+        step = self.step(angle)
+        key = (image, step)
+        rotated_image = self.rotated.get(key)
+        if rotated_image is not None:
+            self.rotated.move_to_end(key)
+            return rotated_image
+
+        rotated_image = self.rotate(image, step)
+        self._add(key, rotated_image)
+        while self.size > self.max_bytes and len(self.rotated) > 1:
+            old_key, old_image = self.rotated.popitem(last=False)
+            self.size -= self._bytes(old_image)
+        return rotated_image
+
+    def step(self, angle):
+        """
+        Method to return the step an angle is rounded to, from 0 to steps - 1
+
+        :param angle: angle in radians clockwise
+        :return step:
+        """
+        return round(angle * self.steps / (2 * math.pi)) % self.steps
+
+    def add_atlas(self, atlas):
+        """
+        Method to use the pre-scaled textures from an atlas (see image_loader.load_atlas) instead of scaling them,
+        and its pre-rotated textures too if they were rotated at the same number of steps as the cache
+
+        :param atlas:
+        """
+        for (name, scale), scaled_image in atlas.scaled.items():
+            self.scaled[(atlas.textures[name], scale)] = scaled_image
+        if atlas.steps != self.steps:
+            return
+        for (name, scale, step), rotated_image in atlas.rotated.items():
+            key = (atlas.scaled[(name, scale)], step)
+            if key not in self.rotated:
+                self._add(key, rotated_image)
+
+    def warm(self, textures, time_limit=None):
+        """
+        Method to fill the cache with every rotation of the textures passed in, stopping if it gets full.
+        The textures are warmed in the order given, so put the most important ones first.
+        With a time limit, the cache can be warmed a little at a time by calling this again until it returns True.
+
+        :param textures: sequence of (texture, scale) pairs
+        :param time_limit: seconds to stop after, or None to warm every texture
+        :return finished: True if every rotation is cached or the cache is full
+        """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        for image, scale in textures:
+            scaled_image = self.get_scaled(image, scale)
+            for step in range(self.steps):
+                key = (scaled_image, step)
+                if key in self.rotated:
+                    continue
+                if deadline is not None and time.perf_counter() > deadline:
+                    return False
+                rotated_image = self.rotate(scaled_image, step)
+                if self.size + self._bytes(rotated_image) > self.max_bytes:
+                    return True
+                self._add(key, rotated_image)
+        return True
+
+    def rotate(self, image, step):
+        """
+        Method to rotate an image by a number of steps clockwise, without caching it
+        (pygame rotates anticlockwise in degrees, so the angle is converted)
+
+        :param image:
+        :param step:
+        :return rotated_image:
+        """
+        return pygame.transform.rotate(image, step * (-360 / self.steps))
+
+    def _add(self, key, rotated_image):
+        self.rotated[key] = rotated_image
+        self.size += self._bytes(rotated_image)
+
+    @staticmethod
+    def _bytes(image):
+        width, height = image.get_size()
+        return width * height * image.get_bytesize()
+
+
+class TextCache:
+    """
+    Class to cache rendered text surfaces, so text is only rendered again when it changes
+    Keyed by font, text and colour, keeping the max_size most recently used surfaces.
+    """
+
+    def __init__(self, max_size=64):
+        """
+        Constructor method for the text cache.
+
+        :param max_size: maximum number of text surfaces to keep
+        """
+        self.max_size = max_size
+        self.surfaces = OrderedDict()  # Maps (font, text, colour) to the rendered surface, least recently used first
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, colour=(255, 255, 255)):
+        """
+        Method to return text rendered (antialiased) in font and colour, rendering it if it isn't in the cache
+
+        :param font:
+        :param text:
+        :param colour:
+        :return text_img:
+        """
+        key = (font, text, colour)
+        text_img = self.surfaces.get(key)
+        if text_img is not None:
+            self.surfaces.move_to_end(key)
+            return text_img
+
+        text_img = self.surfaces[key] = font.render(text, True, colour)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return text_img
+
+
+class ScreenRenderer:
+    """
+    Class to draw frames by redrawing the whole background and flipping the whole display every frame
+
+    Images aren't drawn as soon as they're passed to blit. They're queued in layers, and submit draws each layer
+    in order with a single Surface.blits call, so a frame costs a few calls into pygame instead of one per sprite.
+    Batches of points queued with plot are written straight into the screen's pixels after the layer's images.
+    """
+
+    def __init__(self, screen, background, sort_by_texture=False):
+        """
+        Constructor method for the renderer.
+
+        :param screen: the display surface
+        :param background: image covering the whole screen, drawn under everything else
+        :param sort_by_texture: if True, the images in each layer are drawn grouped by the texture they were made from
+        """
+        self.screen = screen
+        self.background = background
+        self.sort_by_texture = sort_by_texture
+        self.layers = [[] for layer in range(LAYERS)]  # (image, position) pairs queued in each layer
+        self.textures = [[] for layer in range(LAYERS)]  # ID of the texture of each queued image, when sorting
+        self.points = [[] for layer in range(LAYERS)]  # (xs, ys, pixels, size) batches queued in each layer
+
+    def begin_frame(self):
+        """
+        Method to clear the screen to the background at the start of a frame
+        """
+        self.clear_queue()
+        self.screen.blit(self.background, (0, 0))
+
+    def blit(self, image, pos, layer=HUD_LAYER, texture=None):
+        """
+        Method to queue an image to be drawn to the screen when the frame is submitted
+
+        :param image:
+        :param pos: top left corner to draw the image at
+        :param layer: one of the layers from BACKGROUND_LAYER (drawn first) to HUD_LAYER (drawn last)
+        :param texture: the scaled texture image is a rotation of, which the draws are grouped by with
+            sort_by_texture, or None if image isn't made from one
+        """
+        self.layers[layer].append((image, pos))
+        if self.sort_by_texture:
+            self.textures[layer].append(id(image if texture is None else texture))
+
+    def plot(self, xs, ys, pixels, layer, size=1):
+        """
+        Method to queue a batch of small squares to be drawn to the screen when the frame is submitted
+
+        :param xs: NumPy array of the x coordinate of each square's top left corner
+        :param ys: NumPy array of the y coordinates, the whole of each square having to be on the screen
+        :param pixels: NumPy array of each square's colour, mapped to the screen's pixel format
+        :param layer:
+        :param size: width and height of the squares in pixels
+        """
+        self.points[layer].append((xs, ys, pixels, size))
+
+    def submit(self):
+        """
+        Method to draw everything queued since the frame began, one layer at a time
+        """
+        for blits, textures, points in zip(self.layers, self.textures, self.points):
+            if blits:
+                if self.sort_by_texture:
+                    # A stable sort, so the images of each texture are still drawn in the order they were queued
+                    blits[:] = [blit for texture, blit in sorted(zip(textures, blits), key=lambda pair: pair[0])]
+                    textures.clear()
+                self._draw(blits)
+                blits.clear()
+            if points:
+                for xs, ys, pixels, size in points:
+                    self._plot(xs, ys, pixels, size)
+                points.clear()
+
+    def clear_queue(self):
+        for blits in self.layers:
+            blits.clear()
+        for textures in self.textures:
+            textures.clear()
+        for points in self.points:
+            points.clear()
+
+    def _draw(self, blits):
+        self.screen.blits(blits, doreturn=False)
+
+    def _plot(self, xs, ys, pixels, size):
+        """
+        Method to write a batch of squares into the screen's pixels, the same pixel of every square at a time
+        :param xs:
+        :param ys:
+        :param pixels:
+        :param size:
+        :return rect: area drawn to
+        """
+        import pygame.surfarray  # Only needs NumPy when there are points to draw
+        screen_pixels = pygame.surfarray.pixels2d(self.screen)  # Locks the screen until it's deleted
+        for dx in range(size):
+            for dy in range(size):
+                screen_pixels[xs + dx, ys + dy] = pixels
+        del screen_pixels
+        left, top = int(xs.min()), int(ys.min())
+        return pygame.Rect(left, top, int(xs.max()) + size - left, int(ys.max()) + size - top)
+
+    def end_frame(self):
+        """
+        Method to show the frame on the display
+        """
+        pygame.display.flip()
+
+    def invalidate(self):
+        """
+        Method to make the next frame redraw the whole screen
+        """
+        pass
+
+
+class DirtyRectRenderer(ScreenRenderer):
+    """
+    Class to draw frames by only redrawing the parts of the screen that have changed
+
+    The areas drawn to during a frame are remembered, and at the start of the next frame only those areas are
+    restored from the background. Only the areas drawn to in either frame are sent to the display.
+    """
+
+    def __init__(self, screen, background, sort_by_texture=False):
+        super().__init__(screen, background, sort_by_texture)
+        self.previous_rects = []  # Areas drawn to in the last frame
+        self.rects = []  # Areas drawn to in this frame
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """
+        Method to restore the background over everything drawn in the last frame
+        """
+        self.clear_queue()
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            self.screen.blits([(self.background, rect, rect) for rect in self.previous_rects], doreturn=False)
+
+    def _draw(self, blits):
+        self.rects.extend(self.screen.blits(blits))
+
+    def _plot(self, xs, ys, pixels, size):
+        rect = super()._plot(xs, ys, pixels, size)
+        self.rects.append(rect)
+        return rect
+
+    def end_frame(self):
+        """
+        Method to update the changed areas of the display
+        """
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.previous_rects + self.rects)
+        self.previous_rects = self.rects
+        self.rects = []
+
+    def invalidate(self):
+        self.full_redraw = True
+
+
+class PulseAnimation:
+    """
+    Class to hold precomputed frames of an image slowly growing and shrinking
+
+    The image's size follows one period of a sine wave over the frames, and is played back by frame number.
+    Frames that work out to the same size share one scaled surface.
+    """
+
+    def __init__(self, image, frames, amplitude=(40, 10)):
+        """
+        Constructor method for the animation.
+
+        :param image: the image at its normal size
+        :param frames: number of frames in one period of the pulse
+        :param amplitude: largest change in (width, height) in pixels
+        """
+        width, height = image.get_size()
+        scaled = {}  # Maps each size to its scaled surface
+        self.frames = []
+        for frame in range(frames):
+            wave = math.sin(2 * math.pi * frame / frames)
+            size = (int(width + amplitude[0] * wave), int(height + amplitude[1] * wave))
+            if size not in scaled:
+                scaled[size] = pygame.transform.scale(image, size)
+            self.frames.append(scaled[size])
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get(self, frame):
+        """
+        Method to return the image for a frame number, looping back to the start after each period
+        :param frame:
+        :return image:
+        """
+        return self.frames[frame % len(self.frames)]
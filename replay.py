@@ -0,0 +1,100 @@
+"""
+Replay
+Plays back a recording made with Asteroids.py --record headlessly, as fast as possible.
+
+The game is rebuilt from the recorded seed, wave sizes and physics world and stepped with the recorded input,
+starting from the title screen as the recorded game did. Seeking to a tick restores the nearest snapshot before it,
+from the snapshots stored in the recording (see recording.InputRecorder) and the ones taken every few thousand ticks
+while replaying, so it only has to simulate forward from there instead of from the start.
+Run from the repository root with: python replay.py session.rec
+"""
+import argparse
+import bisect
+import time
+
+import Asteroids
+import recording
+import snapshot
+
+
+class Replayer:
+    """
+    Class to step a headless game through a recording, and seek to any tick of it
+    """
+
+    def __init__(self, session, snapshot_every=3600):
+        """
+        Constructor method for the replayer.
+
+        :param session: the Recording to play back
+        :param snapshot_every: number of ticks between the snapshots taken while replaying
+        """
+        self.session = session
+        self.snapshot_every = snapshot_every
+        self.game = Asteroids.Asteroids(numpy_physics=session.numpy_physics, headless=True, seed=session.seed,
+                                        wave_size=session.wave_size, first_wave=session.first_wave)
+        self.game.change_scene(Asteroids.TITLE)
+        self.tick = 0  # Number of recorded ticks played so far
+        self.snapshots = {tick: snapshot.Snapshot.from_bytes(data) for tick, data in session.snapshots.items()}
+        self.snapshots[0] = snapshot.capture(self.game)
+        self.snapshot_ticks = sorted(self.snapshots)  # Ticks snapshots were taken at, in order
+
+    def step(self):
+        """
+        Method to play the next tick of the recording
+        """
+        self.game.dt = self.session.dt
+        self.game.tick(self.session.actions[self.tick])
+        self.tick += 1
+        if self.tick % self.snapshot_every == 0 and self.tick not in self.snapshots:
+            self.snapshots[self.tick] = snapshot.capture(self.game)
+            bisect.insort(self.snapshot_ticks, self.tick)
+
+    def seek(self, tick):
+        """
+        Method to move the game to the state it was in after a number of ticks of the recording
+        Starts from the nearest snapshot at or before the tick if that's closer than the current tick.
+
+        :param tick:
+        """
+        tick = max(0, min(tick, len(self.session)))
+        nearest = self.snapshot_ticks[bisect.bisect_right(self.snapshot_ticks, tick) - 1]
+        if tick < self.tick or nearest > self.tick:
+            snapshot.restore(self.game, self.snapshots[nearest])
+            self.tick = nearest
+        while self.tick < tick:
+            self.step()
+
+    def run(self):
+        """
+        Method to play the rest of the recording
+        """
+        self.seek(len(self.session))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game of Asteroids headlessly")
+    parser.add_argument("path", help="recording made with Asteroids.py --record")
+    parser.add_argument("--seek", type=int, help="tick to stop at instead of the end of the recording")
+    parser.add_argument("--snapshot-every", type=int, default=3600,
+                        help="number of ticks between the snapshots taken while replaying")
+    args = parser.parse_args()
+
+    session = recording.load(args.path)
+    replayer = Replayer(session, args.snapshot_every)
+    target = len(session) if args.seek is None else args.seek
+
+    start = time.perf_counter()
+    replayer.seek(target)
+    seconds = time.perf_counter() - start
+
+    game = replayer.game
+    print("replayed {} of {} ticks in {:.3f} s ({:.0f} ticks/s): score {}, lives {}, scene {}".format(
+        replayer.tick, len(session), seconds, replayer.tick / max(seconds, 1e-9), game.score, game.lives, game.scene))
+    if replayer.tick == len(session):
+        matches = game.score == session.final_score and game.time == session.final_time
+        print("final state {} the recording".format("matches" if matches else "DOES NOT match"))
+
+
+if __name__ == "__main__":
+    main()
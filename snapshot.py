@@ -0,0 +1,300 @@
+"""
+Snapshot
+Captures the whole state of a game between ticks, and restores a game to a captured state.
+
+A restored game carries on exactly as the captured one did, given the same input: the random number generator,
+entity IDs and the order of the entities are all restored along with the sprites' motion. A typical game captures
+in a few tens of microseconds and restores in around a hundred, so a game can be rolled back, or a bot can look ahead
+by capturing the game, simulating forward and restoring it again.
+
+Snapshots are held as packed arrays, and to_bytes writes them in a compact versioned format, all little endian:
+    header          magic and format version
+    game            scene, lives, score, time, dt, menu time, new high score flag, next entity ID, rocket flags and
+                    the number of entities and menu asteroids
+    random state    the random number generator's 625 word state and its cached gaussian
+    rocket          the rocket's motion as 8 doubles
+    entity ints     kind, entity ID, size and texture of each entity in the game, then of each menu asteroid
+    entity floats   x, y, vx, vy, ax, ay, angle, angular velocity and laser start time of each of them
+"""
+import struct
+import sys
+from array import array
+
+import Asteroids
+import vector as v
+
+SNAPSHOT_MAGIC = b"ASNP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sH")
+# Scene, lives, score, time, dt, menu time, new high score, next entity ID, rocket accelerating, rocket rotating,
+# rocket flames, number of entities and number of menu asteroids
+GAME_STRUCT = struct.Struct("<BqqdddBqBBBII")
+RANDOM_STRUCT = struct.Struct("<B625IBd")  # Version, state words, whether a gaussian is cached and its value
+MOTION_STRUCT = struct.Struct("<8d")
+ENTITY_INTS = 4
+ENTITY_FLOATS = 9
+
+SCENES = (None, Asteroids.TITLE, Asteroids.PLAYING, Asteroids.RESPAWN, Asteroids.GAME_OVER)
+
+# Kinds of entity
+ROCKET = 0
+ASTEROID = 1
+LASER = 2
+MENU_ASTEROID = 3
+
+NO_MOTION = (0.0,) * ENTITY_FLOATS
+
+
+class Snapshot:
+    """
+    Class to hold the captured state of a game
+    """
+
+    def __init__(self, game_fields, random_state, rocket_motion, ints, floats):
+        """
+        Constructor method for the snapshot.
+
+        :param game_fields: tuple of the values in GAME_STRUCT
+        :param random_state: state of the game's random number generator, from Random.getstate
+        :param rocket_motion: tuple of the rocket's motion
+        :param ints: array of ENTITY_INTS ints per entity
+        :param floats: array of ENTITY_FLOATS doubles per entity
+        """
+        self.game_fields = game_fields
+        self.random_state = random_state
+        self.rocket_motion = rocket_motion
+        self.ints = ints
+        self.floats = floats
+
+    def __eq__(self, other):
+        return isinstance(other, Snapshot) and self.to_bytes() == other.to_bytes()
+
+    def to_bytes(self):
+        """
+        Method to write the snapshot in the snapshot format
+        :return data:
+        """
+        version, words, gaussian = self.random_state
+        ints = self.ints
+        floats = self.floats
+        if sys.byteorder == "big":
+            ints = array("q", ints)
+            ints.byteswap()
+            floats = array("d", floats)
+            floats.byteswap()
+        return b"".join((SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+                         GAME_STRUCT.pack(*self.game_fields),
+                         RANDOM_STRUCT.pack(version, *words, gaussian is not None, gaussian or 0.0),
+                         MOTION_STRUCT.pack(*self.rocket_motion),
+                         ints.tobytes(), floats.tobytes()))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Method to read a snapshot written by to_bytes
+        Raises ValueError if the data isn't a snapshot of the current version.
+
+        :param data:
+        :return snapshot:
+        """
+        if len(data) < SNAPSHOT_HEADER.size:
+            raise ValueError("snapshot is truncated")
+        magic, version = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("not a snapshot of version {}".format(SNAPSHOT_VERSION))
+
+        offset = SNAPSHOT_HEADER.size
+        game_fields = GAME_STRUCT.unpack_from(data, offset)
+        offset += GAME_STRUCT.size
+        random_fields = RANDOM_STRUCT.unpack_from(data, offset)
+        offset += RANDOM_STRUCT.size
+        rocket_motion = MOTION_STRUCT.unpack_from(data, offset)
+        offset += MOTION_STRUCT.size
+
+        count = game_fields[-2] + game_fields[-1]
+        ints = array("q")
+        floats = array("d")
+        ints_end = offset + count * ENTITY_INTS * ints.itemsize
+        floats_end = ints_end + count * ENTITY_FLOATS * floats.itemsize
+        if len(data) != floats_end:
+            raise ValueError("snapshot is truncated")
+        ints.frombytes(data[offset:ints_end])
+        floats.frombytes(data[ints_end:floats_end])
+        if sys.byteorder == "big":
+            ints.byteswap()
+            floats.byteswap()
+
+        random_state = (random_fields[0], random_fields[1:626], random_fields[627] if random_fields[626] else None)
+        return cls(game_fields, random_state, rocket_motion, ints, floats)
+
+
+def capture(game):
+    """
+    Function to capture the state of a game. Must be called between ticks.
+
+    :param game:
+    :return snapshot:
+    """
+    textures = {image: index for index, image in enumerate(game.sprite_images.values())}
+    # The classes are taken from the game's pools rather than this module's Asteroids, which is a second copy of the
+    #   module when the game is run as a script and recorded (see recording.InputRecorder)
+    asteroid_cls = game.asteroid_pool.cls
+    laser_cls = game.laser_pool.cls
+    ints = []
+    floats = []
+    for entity in game.entities:
+        if type(entity) is asteroid_cls:
+            ints += (ASTEROID, entity.entity_id, entity.size, textures[entity.image])
+            floats += motion(entity)
+            floats.append(0.0)
+        elif type(entity) is laser_cls:
+            ints += (LASER, entity.entity_id, 0, 0)
+            floats += motion(entity)
+            floats.append(entity.start_time)
+        else:
+            ints += (ROCKET, entity.entity_id, 0, 0)
+            floats += NO_MOTION
+    entity_count = len(ints) // ENTITY_INTS
+    for asteroid in game.menu_asteroids:
+        ints += (MENU_ASTEROID, -1, asteroid.size, textures[asteroid.image])
+        floats += motion(asteroid)
+        floats.append(0.0)
+
+    rocket = game.rocket
+    game_fields = (SCENES.index(game.scene), game.lives, game.score, game.time, game.dt, game.menu_time,
+                   game.new_highscore, game.entities.next_id, rocket.accelerating, rocket.rotating,
+                   rocket.scaled_image is rocket.flames_image, entity_count, len(game.menu_asteroids))
+    return Snapshot(game_fields, game.rng.getstate(), motion(rocket), array("q", ints), array("d", floats))
+
+
+def restore(game, snapshot):
+    """
+    Function to restore a game to a captured state, reusing its pooled asteroids and lasers
+
+    :param game:
+    :param snapshot: snapshot returned by capture
+    """
+    (scene, lives, score, time, dt, menu_time, new_highscore, next_id, accelerating, rotating, flames,
+     entity_count, menu_count) = snapshot.game_fields
+    game.clear_objects()
+    game.scene = SCENES[scene]
+    game.next_scene = None
+    game.lives = lives
+    game.score = score
+    game.time = time
+    game.dt = dt
+    game.menu_time = menu_time
+    game.new_highscore = bool(new_highscore)
+
+    rocket = game.rocket
+    set_motion(rocket, snapshot.rocket_motion)
+    rocket.accelerating = bool(accelerating)
+    rocket.rotating = rotating
+    rocket.scaled_image = rocket.flames_image if flames else rocket.normal_image
+
+    textures = list(game.sprite_images.values())
+    ints = snapshot.ints
+    floats = snapshot.floats
+    for index in range(entity_count + menu_count):
+        kind, entity_id, size, texture = ints[index * ENTITY_INTS:(index + 1) * ENTITY_INTS]
+        row = floats[index * ENTITY_FLOATS:(index + 1) * ENTITY_FLOATS]
+        if kind == ROCKET:
+            game.entities.add(rocket, entity_id)
+        elif kind == LASER:
+            laser = make_sprite(game, game.laser_pool, game.sprite_images["laser"], Asteroids.LASER_SCALE, row,
+                                ((0, 0), (0, 0), 0))
+            laser.start_time = row[8]
+            laser.elapsed = time - laser.start_time
+            game.laser_grid.insert(laser)
+            game.entities.add(laser, entity_id)
+        else:
+            image = textures[texture]
+            asteroid = make_sprite(game, game.asteroid_pool, image, Asteroids.ASTEROID_SCALES[size], row,
+                                   (size, image, (0, 0), (0, 0)))
+            asteroid.size = size
+            if kind == MENU_ASTEROID:
+                game.menu_asteroids.append(asteroid)
+            else:
+                game.asteroid_grid.insert(asteroid)
+                game.entities.add(asteroid, entity_id)
+    game.flush_entities()
+    game.entities.next_id = next_id
+
+    if game.scene in Asteroids.MENU_TEXT:
+        game.show_menu_text(*Asteroids.MENU_TEXT[game.scene])
+
+    # Restored last, as making new sprites above can draw from it
+    game.rng.setstate(snapshot.random_state)
+
+
+def make_sprite(game, entity_pool, image, scale, row, spawn_args):
+    """
+    Function to take a sprite from a pool and set its motion from a row of a snapshot
+    Pooled sprites are set up directly, so restoring doesn't pay for choosing random starting conditions.
+
+    :param game:
+    :param entity_pool:
+    :param image:
+    :param scale:
+    :param row: the sprite's row of the snapshot's floats
+    :param spawn_args: arguments to construct a new sprite with if the pool is empty
+    :return sprite:
+    """
+    sprite = entity_pool.take()
+    if sprite is None:
+        sprite = entity_pool.cls(game, *spawn_args)
+        set_motion(sprite, row)
+    else:
+        x, y, vx, vy, ax, ay, angle, angular_velocity = row[:8]
+        sprite.setup(image, scale, (x, y), (vx, vy), angular_velocity, angle)
+        if ax or ay:
+            sprite.acceleration = v.vector2(ax, ay)
+    return sprite
+
+
+def save(game, path):
+    """
+    Function to save the state of a game to a file
+    :param game:
+    :param path:
+    """
+    with open(path, "wb") as f:
+        f.write(capture(game).to_bytes())
+
+
+def load(game, path):
+    """
+    Function to restore a game from a file written by save
+    :param game:
+    :param path:
+    """
+    with open(path, "rb") as f:
+        restore(game, Snapshot.from_bytes(f.read()))
+
+
+def motion(sprite):
+    """
+    Function to return a sprite's position, velocity, acceleration, angle and angular velocity as a tuple
+    :param sprite:
+    :return motion:
+    """
+    position = sprite.position
+    velocity = sprite.velocity
+    acceleration = sprite.acceleration
+    return (position.x, position.y, velocity.x, velocity.y, acceleration.x, acceleration.y,
+            sprite.angle, sprite.angular_velocity)
+
+
+def set_motion(sprite, sprite_motion):
+    """
+    Function to set a sprite's motion from the first 8 values returned by motion
+    :param sprite:
+    :param sprite_motion:
+    """
+    x, y, vx, vy, ax, ay, angle, angular_velocity = sprite_motion[:8]
+    sprite.position = v.vector2(x, y)
+    sprite.velocity = v.vector2(vx, vy)
+    sprite.acceleration = v.vector2(ax, ay)
+    sprite.angle = angle
+    sprite.angular_velocity = angular_velocity
+    sprite.snap()
@@ -0,0 +1,162 @@
+"""
+Spawner
+Chooses where new asteroids appear and how they move, a whole wave at a time.
+
+Each wave's starting conditions are drawn from the game's random number generator in one batch. Positions are drawn
+directly from the part of the screen outside a square safe zone around the rocket, wrapping around the edges of the
+screen as the sprites do, so a position never has to be drawn again for being too close, and a wave of any size is
+spawned in one pass.
+"""
+import math
+
+# Least distance in x or y from the rocket to the centre of a new asteroid, in pixels. Enough for the largest
+#   asteroid to clear the rocket with room to spare
+SAFE_DISTANCE = 250
+# Range of speeds in x and y for each size of asteroid, the smaller asteroids moving faster
+SPEED_RANGES = {3: (5, 9), 2: (7, 11), 1: (10, 14)}
+MAX_ANGULAR_SPEED = 1
+ASTEROID_TEXTURES = ("asteroid1", "asteroid2", "asteroid3")
+
+
+class WaveSpawner:
+    """
+    Class to keep asteroids coming: a first wave when a game starts, and another wave whenever too few are left
+    """
+
+    def __init__(self, game, wave_size=(1, 4), first_wave=3, min_asteroids=3, safe_distance=SAFE_DISTANCE):
+        """
+        Constructor method for the spawner.
+
+        :param game:
+        :param wave_size: (fewest, most) asteroids in each wave after the first, chosen at random between the two
+        :param first_wave: number of asteroids at the start of a game
+        :param min_asteroids: a new wave is spawned when fewer asteroids than this are left
+        :param safe_distance: least distance in x or y from the rocket to the centre of a new asteroid
+        """
+        self.game = game
+        self.wave_size = (wave_size[0], wave_size[1])
+        self.first_wave = first_wave
+        self.min_asteroids = min_asteroids
+        self.safe_distance = safe_distance
+
+    def start(self):
+        """
+        Method to spawn the first wave of a game
+        :return asteroids:
+        """
+        return self.spawn(self.first_wave)
+
+    def update(self):
+        """
+        Method to spawn a wave if too few asteroids are left, called once per tick
+        :return asteroids: the asteroids spawned, if any
+        """
+        if len(self.game.asteroids) < self.min_asteroids:
+            return self.spawn(self.game.rng.randint(*self.wave_size))
+        return []
+
+    def spawn(self, count, size=3):
+        """
+        Method to add a wave of asteroids to the game, away from the rocket
+
+        :param count:
+        :param size:
+        :return asteroids:
+        """
+        rocket_position = self.game.rocket.position
+        add_asteroid = self.game.add_asteroid
+        return [add_asteroid(size, image, position, velocity, angular_velocity)
+                for image, position, velocity, angular_velocity
+                in self.conditions(count, size, (rocket_position.x, rocket_position.y))]
+
+    def conditions(self, count, size, safe_centre):
+        """
+        Method to choose the texture and starting conditions of a wave of asteroids
+
+        :param count:
+        :param size:
+        :param safe_centre: (x, y) the asteroids are kept away from
+        :return conditions: list of (image, position, velocity, angular_velocity) for each asteroid
+        """
+        rng = self.game.rng
+        images = [self.game.sprite_images[name] for name in ASTEROID_TEXTURES]
+        positions = spawn_positions(rng, count, self.game.screen.get_size(), safe_centre, self.safe_distance)
+        motions = spawn_motions(rng, count, size)
+        textures = [int(draw * len(images)) for draw in draws(rng, count)]
+        return [(images[texture], position, velocity, angular_velocity)
+                for texture, position, (velocity, angular_velocity) in zip(textures, positions, motions)]
+
+
+def draws(rng, count):
+    """
+    Function to draw count random numbers in [0, 1) from rng in one batch
+    :param rng:
+    :param count:
+    :return draws:
+    """
+    random = rng.random
+    return [random() for i in range(count)]
+
+
+def spawn_positions(rng, count, screen_dims, safe_centre, safe_distance):
+    """
+    Function to draw positions evenly spread over the screen outside a square safe zone, without ever drawing again
+
+    The screen wraps around, so outside the safe zone is two rectangles: the columns either side of it, which join
+    up around the edge into one band the full height of the screen, and the rows above and below it in the safe
+    zone's columns, which join up the same way. A position is drawn from one of the two with a chance in proportion to
+    its area, then wrapped back onto the screen.
+
+    :param rng:
+    :param count:
+    :param screen_dims: (width, height)
+    :param safe_centre: (x, y) centre of the safe zone
+    :param safe_distance: half the width of the safe zone, shrunk if the screen is too small for it
+    :return positions: list of (x, y)
+    """
+    width, height = screen_dims
+    centre_x, centre_y = safe_centre
+    distance = min(safe_distance, width / 2, height / 2)
+    band_width = width - 2 * distance  # Width of the band of columns either side of the safe zone
+    band_height = height - 2 * distance  # Height of the band of rows above and below it
+    band_area = band_width * height
+    total_area = band_area + 2 * distance * band_height
+    share = band_area / total_area if total_area else 1  # Chance of a position being in the columns
+
+    positions = []
+    batch = draws(rng, count * 3)
+    for index in range(0, count * 3, 3):
+        region, across, down = batch[index:index + 3]
+        if region < share:
+            x = centre_x + distance + across * band_width
+            y = down * height
+        else:
+            x = centre_x - distance + across * 2 * distance
+            y = centre_y + distance + down * band_height
+        positions.append((x % width, y % height))
+    return positions
+
+
+def spawn_motions(rng, count, size):
+    """
+    Function to draw the velocity and angular velocity of asteroids of a size
+    Each component of the velocity has a random direction and a speed in the size's range, and the asteroids spin
+    either way at up to MAX_ANGULAR_SPEED.
+
+    :param rng:
+    :param count:
+    :param size:
+    :return motions: list of ((vx, vy), angular_velocity)
+    """
+    min_speed, max_speed = SPEED_RANGES[size]
+    speed_range = max_speed - min_speed
+
+    motions = []
+    batch = draws(rng, count * 3)
+    for index in range(0, count * 3, 3):
+        # Each draw gives a direction from its first half or second half, and a speed from where it is in that half
+        vx, vy, spin = (2 * draw - 1 for draw in batch[index:index + 3])
+        velocity = (math.copysign(min_speed + abs(vx) * speed_range, vx),
+                    math.copysign(min_speed + abs(vy) * speed_range, vy))
+        motions.append((velocity, spin * MAX_ANGULAR_SPEED))
+    return motions
@@ -2,12 +2,25 @@ import pygame
 import vector as v
 import math
 
+import render
+
+TIME_SCALE = 10  # Simulation seconds per real second, applied to the game's dt
+
 
 class Sprite:
     """
     Class to define the general behaviour of sprites in the game
     Stores the sprite's image and has methods to handle movement and collisions
+
+    If the game has a physics world and the class sets in_physics_world, the sprite's position, velocity,
+    acceleration, angle and angular velocity are stored in a row of the world's arrays and integrated there in one
+    batch, so the properties below become views onto that row.
+
+    The position and angle from before the last update are kept, so the game can draw the sprite part of the way
+    between its last two states when it's drawing more often than it's updating.
     """
+    in_physics_world = False
+    layer = render.ASTEROID_LAYER  # Layer of the renderer the sprite is drawn in
 
     def __init__(self, game, image, scale, init_pos=(0, 0), init_velocity=(0, 0), init_angular_velocity=0, init_angle=0):
         """
@@ -22,33 +35,61 @@ class Sprite:
         """
         self.game = game
         self.screen_dims = pygame.display.get_window_size()
+        self.body = None  # Row in the game's physics world, if the sprite is stored there
+        self.spatial_hash = None  # Collision grid the sprite is stored in, if any
+        self.setup(image, scale, init_pos, init_velocity, init_angular_velocity, init_angle)
+
+    def setup(self, image, scale, init_pos=(0, 0), init_velocity=(0, 0), init_angular_velocity=0, init_angle=0):
+        """
+        Method to set the sprite's image and initial motion.
+        Called by the constructor, and again when a pooled sprite is reused.
+
+        :param image:
+        :param scale:
+        :param init_pos:
+        :param init_velocity:
+        :param init_angular_velocity:
+        :param init_angle:
+        """
         self.scale = (scale[0], scale[1])
 
         # self.image = pygame.image.load(image_path)
         # self.image = self.image.convert_alpha(self.image)
         self.image = image
-        # Scale image to correct size
-        self.scaled_image = pygame.transform.scale(self.image, scale)
+        # Scale image to correct size (the scaled image is shared with other sprites using the same texture)
+        self.scaled_image = self.game.rotation_cache.get_scaled(self.image, scale)
+        # Texture the sprite's collision mask is made from, which stays the same if the drawn image is swapped
+        self.collision_image = self.scaled_image
+        # Radius of a circle around the sprite at any angle, half the diagonal of its image
+        self.radius = math.hypot(scale[0], scale[1]) / 2
 
-        # Initialise vectors for position, velocity and acceleration
-        self.position = v.vector(init_pos[0], init_pos[1])
-        self.velocity = v.vector(init_velocity[0], init_velocity[1])
-        self.acceleration = v.vector()
-        self.accelerating = False
+        if self.in_physics_world and self.game.physics is not None:
+            self.body = self.game.physics.add(self, (init_pos[0], init_pos[1]), (init_velocity[0], init_velocity[1]),
+                                              init_angle, init_angular_velocity)
+        else:
+            # Initialise vectors for position, velocity and acceleration
+            self._position = v.vector2(init_pos[0], init_pos[1])
+            self._velocity = v.vector2(init_velocity[0], init_velocity[1])
+            self._acceleration = v.vector2()
 
-        # Initialise the angle and direction of the sprite
-        self.direction = v.vector()  # A unit vector to represent the sprite's direction
-        self._angle = 0  # Angle in radians clockwise from the y-axis (0 is pointing straight up)
-        self.angle = init_angle
-        self.angular_velocity = init_angular_velocity  # Angular velocity in rad/s
+            # Initialise the angle of the sprite
+            self._angle = init_angle  # Angle in radians clockwise from the y-axis (0 is pointing straight up)
+            self._angular_velocity = init_angular_velocity  # Angular velocity in rad/s
+            self._previous = (self._position.x, self._position.y, self._angle)  # State before the last update
+        self.accelerating = False
         self.rotating = 0
 
     def update(self):
         """
         Method to update the sprite by calculating its position for the next frame
         Uses Euler integration to calculate the updated position, velocity and rotation
+        Sprites stored in the physics world are integrated by the world instead
         """
-        dt = self.game.dt*10   # Simulation timestep
+        if self.body is not None:
+            return
+
+        dt = self.game.dt*TIME_SCALE   # Simulation timestep
+        self._previous = (self._position.x, self._position.y, self._angle)
 
         # Integrate to get the new position and velocity
         self.position = self.position + self.velocity * dt
@@ -57,34 +98,60 @@ class Sprite:
         self.angle = self.angle + self.angular_velocity * dt
 
         self.check_edges()
+        if self.spatial_hash is not None:
+            self.spatial_hash.move(self)
 
     def check_edges(self):
         """
         Method to check whether the sprite has reached the edge of the screen and wrap it around if so
         """
         if self.position.x < 0:
-            self.position = v.vector(self.screen_dims[0], self.position.y)
+            self.position = v.vector2(self.screen_dims[0], self.position.y)
         elif self.position.x > self.screen_dims[0]:
-            self.position = v.vector(0, self.position.y)
+            self.position = v.vector2(0, self.position.y)
 
         if self.position.y < 0:
-            self.position = v.vector(self.position.x, self.screen_dims[1])
+            self.position = v.vector2(self.position.x, self.screen_dims[1])
         elif self.position.y > self.screen_dims[1]:
-            self.position = v.vector(self.position.x, 0)
+            self.position = v.vector2(self.position.x, 0)
 
     def check_collision(self, other):
         """
         Method to check if the sprite has collided with another passed in as other
+        Sprites whose bounding circles or rotated images don't overlap are rejected first, and only then are the
+        opaque pixels of the two sprites' cached collision masks compared.
 
         :param other:
+        :return collided:
         """
-        collided = False
+        position = self.position
+        other_position = other.position
+        dx = other_position.x - position.x
+        dy = other_position.y - position.y
+        reach = self.radius + other.radius
+        if dx * dx + dy * dy >= reach * reach:
+            return False
 
-        if other.corners()[0][0] < self.position.x < other.corners()[2][0]:
-            if other.corners()[0][1] < self.position.y < other.corners()[2][1]:
-                collided = True
+        mask_cache = self.game.mask_cache
+        mask = mask_cache.get(self.collision_image, self.angle)
+        other_mask = mask_cache.get(other.collision_image, other.angle)
+        width, height = mask.get_size()
+        other_width, other_height = other_mask.get_size()
+        # Offset of the other mask's top left corner from this one's, with each image centred on its sprite
+        offset_x = round(dx + (width - other_width) / 2)
+        offset_y = round(dy + (height - other_height) / 2)
+        if offset_x >= width or offset_y >= height or -offset_x >= other_width or -offset_y >= other_height:
+            return False
+        return mask.overlap(other_mask, (offset_x, offset_y)) is not None
 
-        return collided
+    def bounds(self):
+        """
+        Method to return a bounding box as a tuple of (left, top, right, bottom) that contains the sprite at any angle
+        :return bounds:
+        """
+        position = self.position
+        radius = self.radius
+        return position.x - radius, position.y - radius, position.x + radius, position.y + radius
 
     def corners(self):
         """
@@ -99,24 +166,135 @@ class Sprite:
         corners = (c1, c2, c3, c4)
         return corners
 
-    def draw(self):
+    def snap(self):
+        """
+        Method to make the sprite's previous position and angle the same as its current ones.
+        Called after the sprite is moved without being integrated, so it isn't drawn moving across the screen.
+        """
+        if self.body is None:
+            self._previous = (self._position.x, self._position.y, self._angle)
+        else:
+            self.game.physics.snap(self.body)
+
+    def interpolate(self, alpha):
+        """
+        Method to return the position and angle alpha of the way from the sprite's state before the last update to
+        its current state. A sprite that wrapped around the edge of the screen is left where it is now.
+
+        :param alpha: fraction of the way between the two states, from 0 to 1
+        :return (x, y, angle):
+        """
+        position = self.position
+        angle = self.angle
+        if self.body is None:
+            previous_x, previous_y, previous_angle = self._previous
+        else:
+            previous_x, previous_y, previous_angle = self.game.physics.previous(self.body)
+
+        dx = position.x - previous_x
+        dy = position.y - previous_y
+        if abs(dx) > self.screen_dims[0] / 2 or abs(dy) > self.screen_dims[1] / 2:
+            return position.x, position.y, angle
+        return previous_x + dx * alpha, previous_y + dy * alpha, previous_angle + (angle - previous_angle) * alpha
+
+    def draw(self, alpha=1.0):
         """
         Method to draw the sprite onto the screen
+
+        :param alpha: fraction of the way from the sprite's state before the last update to its current state to
+            draw it at
         """
-        # Rotate image (angle is stored in radians clockwise from 0, has to be converted to degrees anticlockwise)
-        rotated_image = pygame.transform.rotate(self.scaled_image, self.angle*(-180/math.pi))
+        if alpha < 1:
+            x, y, angle = self.interpolate(alpha)
+        else:
+            position = self.position
+            x, y, angle = position.x, position.y, self.angle
+        # Get the rotated image from the game's cache, which rotates it the first time each angle is used
+        rotated_image = self.game.rotation_cache.get(self.scaled_image, angle)
         # Calculate a position to display the sprite, correcting for the error caused by
         #   rotation and scaling
         w, h = rotated_image.get_size()
-        display_pos = (self.position[0] - (w / 2), self.position[1] - (h / 2))
+        display_pos = (x - (w / 2), y - (h / 2))
         # Draw image to screen
-        self.game.screen.blit(rotated_image, display_pos)
+        self.game.renderer.blit(rotated_image, display_pos, self.layer, self.scaled_image)
+
+    def detach(self):
+        """
+        Method to free the sprite's row in the physics world, if it has one.
+        Called when the sprite is removed from the game.
+        """
+        if self.body is not None:
+            self.game.physics.remove(self)
+
+    @property
+    def position(self):
+        if self.body is None:
+            return self._position
+        return self.game.physics.get_vector(self.game.physics.position, self.body)
+
+    @position.setter
+    def position(self, new_position):
+        if self.body is None:
+            self._position = new_position
+        else:
+            self.game.physics.position[self.body] = (new_position.x, new_position.y)
+
+    @property
+    def velocity(self):
+        if self.body is None:
+            return self._velocity
+        return self.game.physics.get_vector(self.game.physics.velocity, self.body)
+
+    @velocity.setter
+    def velocity(self, new_velocity):
+        if self.body is None:
+            self._velocity = new_velocity
+        else:
+            self.game.physics.velocity[self.body] = (new_velocity.x, new_velocity.y)
+
+    @property
+    def acceleration(self):
+        if self.body is None:
+            return self._acceleration
+        return self.game.physics.get_vector(self.game.physics.acceleration, self.body)
+
+    @acceleration.setter
+    def acceleration(self, new_acceleration):
+        if self.body is None:
+            self._acceleration = new_acceleration
+        else:
+            self.game.physics.acceleration[self.body] = (new_acceleration.x, new_acceleration.y)
 
     @property
     def angle(self):
-        return self._angle
+        if self.body is None:
+            return self._angle
+        return float(self.game.physics.angle[self.body])
 
     @angle.setter
     def angle(self, new_angle):
-        self._angle = new_angle
-        self.direction = v.vector(math.sin(new_angle), -math.cos(new_angle))
+        if self.body is None:
+            self._angle = new_angle
+        else:
+            self.game.physics.angle[self.body] = new_angle
+
+    @property
+    def angular_velocity(self):
+        if self.body is None:
+            return self._angular_velocity
+        return float(self.game.physics.angular_velocity[self.body])
+
+    @angular_velocity.setter
+    def angular_velocity(self, new_angular_velocity):
+        if self.body is None:
+            self._angular_velocity = new_angular_velocity
+        else:
+            self.game.physics.angular_velocity[self.body] = new_angular_velocity
+
+    @property
+    def direction(self):
+        """
+        A unit vector to represent the sprite's direction, calculated from the angle when it's needed
+        """
+        angle = self.angle
+        return v.vector2(math.sin(angle), -math.cos(angle))
@@ -216,3 +216,145 @@ class vector:
             unit = self
 
         return unit
+
+
+#========== Compact 2D Vector Class Definition ==========
+class vector2:
+    """
+    Compact 2D vector with the same interface as vector
+
+    Used for the per-frame sprite physics, where lots of short-lived vectors are made. The magnitude and unit vector
+    are only calculated the first time they are used and then cached, and __slots__ keeps each object small.
+    The cached values assume the components are not changed after the vector is made, so treat it as immutable.
+    """
+    __slots__ = ("x", "y", "_mag", "_unit")
+
+    dimension = 2
+    z = None
+
+    def __init__(self, x=0, y=0):
+        """
+        Method to initialise the vector object. x and y default to 0
+        """
+        self.x = x
+        self.y = y
+        self._mag = None
+        self._unit = None
+
+    def __str__(self):
+        """
+        Method to print the vector in a human readable format
+        """
+        return "({},{})".format(self.x, self.y)
+
+    def __repr__(self):
+        """
+        Method to print a python representation of the object, which can be used to create a new object using the eval() function
+        """
+        return "vector2({},{})".format(self.x, self.y)
+
+    def __abs__(self):
+        """
+        Method to return the magnitude of the vector when the abs() function is called on it
+        """
+        return self.mag
+
+    def __eq__(self, other):
+        """
+        Method to compare the vector object using the == equality comparison.
+        Returns False if the other object is not a vector.
+        """
+        try:
+            return self.x == other.x and self.y == other.y and other.z is None
+        except AttributeError:
+            return False
+
+    def __add__(self, other):
+        """
+        Method to add two vectors using the + operator.
+        """
+        return vector2(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        """
+        Method to take one vector away from another using the - operator.
+        """
+        return vector2(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, other):
+        """
+        Method to multiply a vector. If the other object is a vector, the cross product is returned, otherwise the
+        vector is multiplied by a scalar.
+        """
+        if isinstance(other, (vector2, vector)):
+            return self.cross(other)
+        return vector2(self.x * other, self.y * other)
+
+    def __truediv__(self, other):
+        """
+        Method to divide a vector by a scalar.
+        """
+        return vector2(self.x / other, self.y / other)
+
+    def __getitem__(self, num):
+        """
+        Method to make the vector object subscriptable
+        """
+        if num == 0:
+            return self.x
+        elif num == 1:
+            return self.y
+        raise IndexError("Index out of Bounds")
+
+    def dot(self, other):
+        """
+        Method to return the dot product with the vector passed in as other
+        """
+        return self.x * other.x + self.y * other.y
+
+    def cross(self, other):
+        """
+        Method to return the cross product with the vector passed in as other. The result is a 3D vector.
+        """
+        if other.z is None:
+            return vector(0, 0, self.x * other.y - self.y * other.x)
+        return vector(self.x, self.y, 0).cross(other)
+
+    def angle(self, other=None):
+        """
+        Method to return the angle between this vector and another passed in as other.
+
+        If no other vector is passed in, it defaults to the angle between the vector and the x axis
+        """
+        if other is None:
+            other = vector2(1, 0)
+
+        return math.acos(self.dot(other) / (self.mag * other.mag))
+
+    def magnitude(self):
+        """
+        Method to return the magnitude of the vector
+        """
+        return math.hypot(self.x, self.y)
+
+    @property
+    def mag(self):
+        """
+        Magnitude of the vector, calculated on first use
+        """
+        if self._mag is None:
+            self._mag = math.hypot(self.x, self.y)
+        return self._mag
+
+    @property
+    def unit(self):
+        """
+        Unit vector in the direction of this vector, calculated on first use
+        """
+        if self._unit is None:
+            mag = self.mag
+            if mag != 0 and mag != 1:
+                self._unit = vector2(self.x / mag, self.y / mag)
+            else:
+                self._unit = self
+        return self._unit